@@ -0,0 +1,215 @@
+import threading
+
+import streamlit as st
+from ad_tables import (
+    FACEBOOK_SORTS,
+    concat_frames,
+    facebook_ads_frame,
+    filter_facebook,
+    platform_set,
+    records,
+    sort_facebook,
+    summarize_facebook,
+)
+from creative_clusters import assign_clusters, collapse_variants
+from object_store import get_object_store
+
+PAGE_SIZES = [10, 25, 50, 100]
+
+
+class AdTable:
+    """Ads for one page ID, fetched one API page at a time by following the response cursor.
+
+    Each page is flattened into ad_tables' columnar schema on arrival and the
+    raw JSON is dropped, so summaries, filters and sorts run on the table.
+    One AdTable per page ID and source is shared by every session through the
+    object store; the lock keeps two sessions from fetching the same page.
+    """
+
+    def __init__(self, page_id):
+        self.page_id = page_id
+        self.table = facebook_ads_frame([])
+        self.cursor = None
+        self.exhausted = False
+        self.failed = False
+        self.error = False  # the last fetch failed; the cursor is kept so the next one retries
+        self._clusters = None
+        self._lock = threading.Lock()
+
+    def load_next(self, fetch_page, loaded):
+        """Fetch the next page unless another session already has since this one saw `loaded` ads"""
+        with self._lock:
+            if self.exhausted or len(self.table) != loaded:
+                return 0
+            data = fetch_page(self.page_id, self.cursor)
+            if not data or "results" not in data:
+                self.error = True
+                if self.table.empty:
+                    self.exhausted = self.failed = True
+                return 0
+            self.error = False
+            results = data["results"]
+            if results:
+                self.table = concat_frames([self.table, facebook_ads_frame(results)])
+            self.cursor = data.get("cursor")
+            if not self.cursor or not results:
+                self.exhausted = True
+            return len(results)
+
+    def clusters(self):
+        """Near-duplicate cluster id per loaded ad, recomputed only when more ads have arrived"""
+        table, clusters = self.table, self._clusters
+        if clusters is None or len(clusters) != len(table):
+            clusters = self._clusters = assign_clusters(table)
+        return clusters
+
+    def memory_bytes(self):
+        clusters = self._clusters
+        return int(self.table.memory_usage(deep=True).sum()) + (clusters.nbytes if clusters is not None else 0)
+
+
+class AdPager:
+    """A session's view onto the shared AdTable for one page ID; it holds only the object store key.
+
+    source names where fetch_page reads from ("api" or "store"), and version
+    (e.g. the store's last sync time) retires a table once its source has changed.
+    """
+
+    def __init__(self, page_id, source="api", version=None, ttl=None):
+        self.page_id = page_id
+        self.key = f"facebook_ads:{source}:{page_id}" + (f":{version}" if version is not None else "")
+        self.ttl = ttl
+        self._ads = None
+
+    @property
+    def ads(self):
+        # Held for the rest of this script run, so an eviction mid-render cannot swap the table out
+        if self._ads is None:
+            self._ads = get_object_store().get_or_create(self.key, lambda: AdTable(self.page_id), self.ttl)
+        return self._ads
+
+    @property
+    def table(self):
+        return self.ads.table
+
+    @property
+    def has_more(self):
+        return not self.ads.exhausted
+
+    @property
+    def failed(self):
+        return self.ads.failed
+
+    @property
+    def error(self):
+        return self.ads.error
+
+    def load_next(self, fetch_page):
+        ads = self.ads
+        loaded = ads.load_next(fetch_page, len(ads.table))
+        if ads.failed:
+            # Don't share a failure; the next run (in any session) tries again
+            get_object_store().discard(self.key)
+        elif loaded:
+            get_object_store().resize(self.key)
+        return loaded
+
+    def clusters(self):
+        return self.ads.clusters()
+
+    def window(self, start, size, fetch_page, view=None):
+        """Rows [start, start + size) of view(table), fetching further pages only if needed.
+
+        Returns (rows, matching) where matching is how many loaded ads pass the view.
+        """
+        while True:
+            frame = view(self.table) if view else self.table
+            if len(frame) >= start + size or not self.has_more:
+                break
+            if not self.load_next(fetch_page) and self.error:
+                break  # show what is loaded; the next run retries from the same cursor
+        return records(frame.iloc[start:start + size]), len(frame)
+
+
+def render_summary(pager, placeholders):
+    total_slot, active_slot, platforms_slot = placeholders
+    summary = summarize_facebook(pager.table)
+    total_slot.metric("Total Ads", f"{summary['total']}+" if pager.has_more else summary["total"])
+    active_slot.metric("Active Ads", summary["active"])
+    platforms = summary["platforms"]
+    platforms_slot.write(f"**Platforms:** {', '.join(sorted(platforms)) if platforms else 'N/A'}")
+
+
+def _change_page(key, delta):
+    st.session_state[key] = max(0, st.session_state[key] + delta)
+
+
+def _reset_page(key):
+    st.session_state[key] = 0
+
+
+def render_paginated_ads(pager, fetch_page, display_ad_card, key="ads", on_window=None):
+    """Render summary metrics, page controls and only the visible window of ad cards.
+
+    on_window, if given, is called with the visible ads before they are drawn
+    (e.g. to start media prefetching).
+    """
+    page_key = f"{key}_page"
+    size_key = f"{key}_page_size"
+    owner_key = f"{key}_page_owner"
+    if st.session_state.get(owner_key) != pager.page_id:
+        st.session_state[owner_key] = pager.page_id
+        st.session_state[page_key] = 0
+        # Platform options come from the loaded ads, so a previous advertiser's picks may not exist
+        st.session_state.pop(f"{key}_platforms", None)
+
+    summary = [slot.empty() for slot in st.columns(3)]
+    col1, col2, col3, col4, col5 = st.columns([1, 1, 2, 1, 1])
+    with col1:
+        page_size = st.selectbox("Ads per page", PAGE_SIZES, key=size_key, on_change=_reset_page, args=(page_key,))
+    with col2:
+        sort = st.selectbox("Sort", list(FACEBOOK_SORTS), key=f"{key}_sort", on_change=_reset_page, args=(page_key,))
+    with col3:
+        platforms = st.multiselect(
+            "Platforms", sorted(platform_set(pager.table)), key=f"{key}_platforms", on_change=_reset_page, args=(page_key,)
+        )
+    with col4:
+        active_only = st.checkbox("Active only", key=f"{key}_active", on_change=_reset_page, args=(page_key,))
+    with col5:
+        collapse = st.checkbox(
+            "Collapse variants", key=f"{key}_collapse", on_change=_reset_page, args=(page_key,),
+            help="Show one card per group of near-identical creatives (same copy or same image)",
+        )
+
+    def view(table):
+        frame = sort_facebook(filter_facebook(table, active_only, platforms), sort)
+        return collapse_variants(frame, pager.clusters()) if collapse else frame
+
+    start = st.session_state[page_key] * page_size
+    with st.spinner(f"Fetching ads for Page ID: {pager.page_id}..."):
+        ads, matching = pager.window(start, page_size, fetch_page, view)
+    if not ads and start:
+        # The list shrank (or the page size grew) underneath us; fall back to the first page
+        st.session_state[page_key] = 0
+        start = 0
+        ads, matching = pager.window(0, page_size, fetch_page, view)
+    render_summary(pager, summary)
+    if pager.error and not pager.failed:
+        st.warning("Could not fetch more ads. Showing the ones loaded so far; press Next or rerun to retry.")
+
+    more = "+" if pager.has_more else ""
+    if ads:
+        note = " (sorting applies to loaded ads)" if sort != "API order" and pager.has_more else ""
+        st.caption(f"Showing ads {start + 1}–{start + len(ads)} of {matching}{more}{note}")
+        if on_window:
+            on_window(ads)
+        for i, ad in enumerate(ads):
+            display_ad_card(ad, start + i)
+
+    has_next = matching > start + page_size or pager.has_more
+    col1, col2 = st.columns(2)
+    with col1:
+        st.button("⬅️ Previous", key=f"{key}_prev", disabled=start == 0, on_click=_change_page, args=(page_key, -1))
+    with col2:
+        st.button("Next ➡️", key=f"{key}_next", disabled=not has_next, on_click=_change_page, args=(page_key, 1))
+    return ads
@@ -0,0 +1,94 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from rate_limit import BULK, current_caller, set_caller
+from response_cache import get_cache
+from scrapecreators import COMPANY_ADS, company_ads_params, get_company_ads
+
+# ========== CONFIG ==========
+TOP_N = int(os.environ.get("ADS_PREFETCH_TOP_N", 3))
+BUDGET = int(os.environ.get("ADS_PREFETCH_BUDGET", 3))  # upstream calls one search may spend speculatively
+MAX_WORKERS = 2
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="ad-prefetch")
+
+
+def rank_companies(results):
+    """Search results in the order a user is likely to pick them: verified pages first, then by likes"""
+    return sorted(
+        results,
+        key=lambda company: (company.get("verification") == "VERIFIED", company.get("likes") or 0),
+        reverse=True,
+    )
+
+
+class SpeculativePrefetch:
+    """Warms the response cache with the first ads page of likely picks from one search.
+
+    Runs at bulk priority for the calling session, so it never delays that
+    session's interactive requests. cancel() drops whatever has not started;
+    a fetch already in flight finishes and is shared with a matching Select
+    through request coalescing.
+    """
+
+    def __init__(self, page_ids, budget=BUDGET, max_age=None):
+        self.max_age = max_age
+        self.warmed = []
+        self._budget = budget
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        session, _ = current_caller()
+        self._futures = [_executor.submit(self._warm, session, page_id) for page_id in page_ids]
+
+    def _spend(self):
+        with self._lock:
+            if self._budget <= 0:
+                return False
+            self._budget -= 1
+            return True
+
+    def _warm(self, session, page_id):
+        if self._cancelled.is_set():
+            return
+        set_caller(session, BULK)
+        cached = get_cache().get(COMPANY_ADS, company_ads_params(page_id), max_age=self.max_age)
+        if cached is not None and cached[1]:
+            return
+        if not self._spend():
+            return
+        try:
+            get_company_ads(page_id, fresh=True)
+        except Exception:
+            return  # the user's own request will surface the error if they pick this page
+        self.warmed.append(page_id)
+
+    def cancel(self):
+        self._cancelled.set()
+        for future in self._futures:
+            future.cancel()
+
+    def done(self):
+        return all(future.done() for future in self._futures)
+
+
+# Live prefetches by key (one per dashboard session), so sessions hold only the key
+_active = {}
+_active_lock = threading.Lock()
+
+
+def start_prefetch(key, page_ids):
+    """Cancel the prefetch running under key, if any, and start one for page_ids (none if empty)"""
+    with _active_lock:
+        previous = _active.pop(key, None)
+    if previous is not None:
+        previous.cancel()
+    if not page_ids:
+        return None
+    prefetch = SpeculativePrefetch(page_ids)
+    with _active_lock:
+        # Finished prefetches of sessions that have since gone away need no handle
+        for done in [other for other, running in _active.items() if running.done()]:
+            del _active[done]
+        _active[key] = prefetch
+    return prefetch
@@ -0,0 +1,184 @@
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+
+    STRING_DTYPE = "string[pyarrow]"
+except ImportError:
+    STRING_DTYPE = "string"
+
+# ========== SCHEMAS ==========
+FACEBOOK_STRING_COLUMNS = [
+    "ad_archive_id", "page_name", "body_text", "snapshot_title", "snapshot_caption", "snapshot_cta_text",
+    "link_url", "card_title", "card_body", "original_image_url", "video_url", "video_hd_url", "video_sd_url",
+    "video_preview_image_url", "cta_text", "link_caption", "link_description", "url",
+]
+FACEBOOK_CATEGORY_COLUMNS = ["platforms", "display_format"]
+PLATFORM_SEPARATOR = ", "
+GOOGLE_COLUMNS = ["creativeId", "advertiserId", "format", "firstShown", "lastShown", "adUrl"]
+GOOGLE_STRING_COLUMNS = ["creativeId", "advertiserId", "adUrl"]
+GOOGLE_CATEGORY_COLUMNS = ["format"]
+REEL_STRING_COLUMNS = ["code", "caption", "display_uri"]
+REEL_COUNT_COLUMNS = ["play_count", "like_count", "share_count", "comment_count"]
+
+
+def _text(value):
+    if isinstance(value, dict):
+        value = value.get("text")
+    return value if value not in ("", None) else None
+
+
+def _finish(frame, string_columns, category_columns):
+    for column in string_columns:
+        frame[column] = frame[column].astype(STRING_DTYPE)
+    for column in category_columns:
+        frame[column] = frame[column].astype("category")
+    return frame
+
+
+def facebook_row(ad):
+    """One Facebook ad as a flat dict of FACEBOOK_COLUMNS"""
+    snapshot = ad.get("snapshot") or {}
+    cards = snapshot.get("cards") or []
+    card = cards[0] if cards else {}
+    impressions = ad.get("impressions") or {}
+    return {
+        "ad_archive_id": ad.get("ad_archive_id"),
+        "is_active": bool(ad.get("is_active")),
+        "start_date": ad.get("start_date_string"),
+        "impressions_lower": impressions.get("lower_bound"),
+        "impressions_upper": impressions.get("upper_bound"),
+        "page_name": snapshot.get("page_name"),
+        "body_text": _text(snapshot.get("body")),
+        "snapshot_title": _text(snapshot.get("title")),
+        "snapshot_caption": _text(snapshot.get("caption")),
+        "snapshot_cta_text": _text(snapshot.get("cta_text")),
+        "link_url": snapshot.get("link_url"),
+        "display_format": snapshot.get("display_format"),
+        "has_card": bool(cards),
+        "card_title": _text(card.get("title")),
+        "card_body": _text(card.get("body")),
+        "original_image_url": card.get("original_image_url"),
+        "video_url": card.get("video_url"),
+        "video_hd_url": card.get("video_hd_url"),
+        "video_sd_url": card.get("video_sd_url"),
+        "video_preview_image_url": card.get("video_preview_image_url"),
+        "cta_text": _text(card.get("cta_text")),
+        "link_caption": _text(card.get("link_caption")),
+        "link_description": _text(card.get("link_description")),
+        "platforms": PLATFORM_SEPARATOR.join(ad.get("publisher_platform") or []) or None,
+        "url": ad.get("url"),
+    }
+
+
+FACEBOOK_COLUMNS = list(facebook_row({}).keys())
+
+
+def facebook_ads_frame(results):
+    """Flatten Facebook Ad Library `results` into one typed row per ad"""
+    frame = pd.DataFrame([facebook_row(ad) for ad in results], columns=FACEBOOK_COLUMNS)
+    frame["is_active"] = frame["is_active"].astype(bool)
+    frame["has_card"] = frame["has_card"].astype(bool)
+    frame["start_date"] = pd.to_datetime(frame["start_date"], utc=True, errors="coerce")
+    for column in ("impressions_lower", "impressions_upper"):
+        frame[column] = pd.to_numeric(frame[column], errors="coerce").astype("Int64")
+    return _finish(frame, FACEBOOK_STRING_COLUMNS, FACEBOOK_CATEGORY_COLUMNS)
+
+
+def concat_frames(frames, string_columns=FACEBOOK_STRING_COLUMNS, category_columns=FACEBOOK_CATEGORY_COLUMNS):
+    # Categoricals with different category sets concatenate to object; re-type afterwards
+    frame = pd.concat(frames, ignore_index=True)
+    return _finish(frame, string_columns, category_columns)
+
+
+def google_row(ad):
+    return {column: ad.get(column) for column in GOOGLE_COLUMNS}
+
+
+def google_ads_frame(ads):
+    """Flatten Google `ads` into one typed row per creative"""
+    frame = pd.DataFrame([google_row(ad) for ad in ads], columns=GOOGLE_COLUMNS)
+    for column in ("firstShown", "lastShown"):
+        frame[column] = pd.to_datetime(frame[column], utc=True, errors="coerce")
+    return _finish(frame, GOOGLE_STRING_COLUMNS, GOOGLE_CATEGORY_COLUMNS)
+
+
+def reel_row(media):
+    """One reel's media object as a flat dict of REEL_COLUMNS"""
+    return {
+        "code": media.get("code"),
+        "caption": _text(media.get("caption")),
+        "taken_at": media.get("taken_at"),
+        "play_count": media.get("play_count") or media.get("ig_play_count"),
+        "like_count": media.get("like_count"),
+        "share_count": media.get("share_count"),
+        "comment_count": media.get("comment_count"),
+        "display_uri": media.get("display_uri"),
+        "media_type": media.get("media_type"),
+    }
+
+
+REEL_COLUMNS = list(reel_row({}).keys())
+
+
+def reels_frame(entries):
+    """Flatten Instagram reel entries ({"media": {...}}) into one typed row per reel"""
+    rows = [reel_row(entry["media"]) for entry in entries if entry.get("media")]
+    frame = pd.DataFrame(rows, columns=REEL_COLUMNS)
+    frame["taken_at"] = pd.to_datetime(pd.to_numeric(frame["taken_at"], errors="coerce"), unit="s", utc=True)
+    for column in REEL_COUNT_COLUMNS:
+        frame[column] = pd.to_numeric(frame[column], errors="coerce").astype("Int64")
+    return _finish(frame, REEL_STRING_COLUMNS, ["media_type"])
+
+
+def records(frame):
+    """Rows as plain dicts with missing values as None, for rendering a small window"""
+    return frame.astype(object).where(frame.notna(), None).to_dict("records")
+
+
+# ========== VECTORIZED OPERATIONS ==========
+def platform_set(frame):
+    # Only the distinct platform combinations are split, not every row
+    platforms = set()
+    for combination in frame["platforms"].dropna().unique():
+        platforms.update(combination.split(PLATFORM_SEPARATOR))
+    return platforms
+
+
+def summarize_facebook(frame):
+    return {
+        "total": len(frame),
+        "active": int(frame["is_active"].sum()),
+        "platforms": platform_set(frame),
+    }
+
+
+def filter_facebook(frame, active_only=False, platforms=None):
+    mask = pd.Series(True, index=frame.index)
+    if active_only:
+        mask &= frame["is_active"]
+    if platforms:
+        # Match whole platform names within the few distinct combinations, then select rows by category
+        wanted = set(platforms)
+        combinations = [
+            combination for combination in frame["platforms"].cat.categories
+            if wanted.intersection(combination.split(PLATFORM_SEPARATOR))
+        ]
+        mask &= frame["platforms"].isin(combinations)
+    return frame[mask]
+
+
+FACEBOOK_SORTS = {
+    "API order": None,
+    "Newest first": ("start_date", False),
+    "Oldest first": ("start_date", True),
+    "Most impressions": ("impressions_upper", False),
+}
+
+
+def sort_facebook(frame, sort):
+    order = FACEBOOK_SORTS.get(sort)
+    if order is None:
+        return frame
+    column, ascending = order
+    return frame.sort_values(column, ascending=ascending, na_position="last", kind="stable")
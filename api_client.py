@@ -0,0 +1,91 @@
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from metrics import count, timer
+
+# ========== CONFIG ==========
+API_KEY = os.environ.get("SCRAPECREATORS_API_KEY", "")
+BASE_URL = os.environ.get("SCRAPECREATORS_BASE_URL", "https://api.scrapecreators.com").rstrip("/")
+
+CONNECT_TIMEOUT = float(os.environ.get("SCRAPECREATORS_CONNECT_TIMEOUT", 5))
+READ_TIMEOUT = float(os.environ.get("SCRAPECREATORS_READ_TIMEOUT", 60))
+POOL_SIZE = 32
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class ApiError(Exception):
+    def __init__(self, status_code, message=""):
+        super().__init__(f"HTTP {status_code}: {message}" if message else f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+_session = None
+_external_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session(headers):
+    retry = Retry(
+        total=MAX_RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(headers)
+    return session
+
+
+def get_session():
+    """Process-wide keep-alive session shared by every ScrapeCreators call"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session({
+                    "x-api-key": API_KEY,
+                    "Accept": "application/json",
+                    "Accept-Encoding": "gzip, deflate",
+                })
+    return _session
+
+
+def get_external_session():
+    """Pooled session for non-ScrapeCreators hosts (media CDNs, Google APIs); never carries the API key"""
+    global _external_session
+    if _external_session is None:
+        with _session_lock:
+            if _external_session is None:
+                _external_session = _build_session({"Accept-Encoding": "gzip, deflate"})
+    return _external_session
+
+
+def api_get(path, params=None, timeout=None):
+    url = f"{BASE_URL}{path}"
+    return get_session().get(url, params=params, timeout=timeout or (CONNECT_TIMEOUT, READ_TIMEOUT))
+
+
+def get_json(path, params=None, timeout=None):
+    """GET a ScrapeCreators endpoint and return its JSON body, raising ApiError on non-200"""
+    with timer("upstream_request_seconds", endpoint=path):
+        try:
+            response = api_get(path, params, timeout)
+        except requests.RequestException:
+            count("upstream_responses_total", endpoint=path, status="error")
+            raise
+    count("upstream_responses_total", endpoint=path, status=response.status_code)
+    if response.status_code != 200:
+        raise ApiError(response.status_code, response.text[:200])
+    with timer("json_parse_seconds", endpoint=path):
+        return response.json()
@@ -0,0 +1,271 @@
+"""Headless JSON API over the same fetch and normalize layer as the dashboards.
+
+    API_TOKEN=secret python api_server.py --port 8600    # needs uvicorn
+    curl 'localhost:8600/v1/facebook/ads?page_id=51212153078&fields=ad_archive_id,start_date'
+    curl 'localhost:8600/v1/google/ads?domain=nike.com'
+    curl 'localhost:8600/v1/instagram/reels?handle=nike&amount=50'
+    curl 'localhost:8600/v1/pagespeed?url=https://web.dev/&strategy=mobile'
+
+`app` is a plain ASGI callable, so any ASGI server can host it. Lookups run
+on a bounded thread pool inside the process that owns the response cache,
+rate limiter and keep-alive upstream session, and the cache itself is shared
+on disk, so the API and the dashboards never pay for the same upstream call
+twice. Rows are projected and typed exactly as exports are; pass `fields` to
+keep only some of them.
+
+The server binds loopback unless given --host. With API_TOKEN set, every
+route but /healthz needs "Authorization: Bearer <token>", and only such
+callers may name themselves with X-Caller (and send X-Priority: bulk) for the
+shared rate limiter and credit ledger; otherwise each client address is one
+interactive caller, so nobody can spread their load over made-up names.
+"""
+import argparse
+import asyncio
+import contextvars
+import hmac
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from ad_tables import facebook_row, google_row, reel_row
+from api_client import ApiError
+from export import project, select_fields
+from fb_sync import get_sync_store
+from instagram_fetch import DEFAULT_REEL_COUNT, iter_reel_pages
+from metrics import count, get_metrics, timer
+from pagespeed import STRATEGIES, analyze, get_store
+from rate_limit import BULK, INTERACTIVE, RateLimitExceeded, set_caller
+from scrapecreators import get_company_ads, get_google_ads, get_instagram_profile, search_companies
+from watchlist import get_watchlist
+
+# ========== CONFIG ==========
+API_HOST = os.environ.get("API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("API_PORT", 8600))
+API_TOKEN = os.environ.get("API_TOKEN", "")  # shared secret; empty = no auth, and X-Caller/X-Priority are ignored
+API_WORKERS = int(os.environ.get("API_WORKERS", 32))  # lookups in flight per process; the rest queue
+MAX_REELS = 500
+
+
+class BadRequest(ValueError):
+    pass
+
+
+class NotFound(LookupError):
+    pass
+
+
+class BadUpstreamResponse(ValueError):
+    """Upstream answered 200 with a payload we cannot read"""
+
+
+def _required(params, name):
+    value = (params.get(name) or "").strip()
+    if not value:
+        raise BadRequest(f"Missing required parameter: {name}")
+    return value
+
+
+def _flag(params, name):
+    return params.get(name, "").lower() in ("1", "true", "yes")
+
+
+def _rows(kind, records, params):
+    fields = [field.strip() for field in params["fields"].split(",")] if params.get("fields") else None
+    try:
+        fields = select_fields(kind, fields)
+    except ValueError as e:
+        raise BadRequest(str(e)) from None
+    return list(project(records, fields))
+
+
+# ========== ROUTES ==========
+def facebook_companies(params):
+    return {"results": search_companies(_required(params, "query")).get("searchResults") or []}
+
+
+def facebook_ads(params):
+    """One page of a page's ads; from the local sync store when asked or when the page is watched"""
+    page_id = _required(params, "page_id")
+    # A watched page is read from the store only once the daemon has synced it
+    from_store = _flag(params, "store") or (
+        get_watchlist().is_watched("facebook", page_id) and get_sync_store().last_synced(page_id) is not None
+    )
+    if from_store:
+        page = get_sync_store().fetch_page(page_id, params.get("cursor"))
+    else:
+        page = get_company_ads(page_id, params.get("cursor"))
+    records = ({"page_id": page_id, **facebook_row(ad)} for ad in page.get("results") or [])
+    return {
+        "page_id": page_id,
+        "source": "store" if from_store else "api",
+        "ads": _rows("facebook", records, params),
+        "cursor": page.get("cursor"),
+    }
+
+
+def google_ads(params):
+    domain = _required(params, "domain")
+    records = ({"domain": domain, **google_row(ad)} for ad in get_google_ads(domain))
+    return {"domain": domain, "ads": _rows("google", records, params)}
+
+
+def instagram_profile(params):
+    handle = _required(params, "handle").lstrip("@")
+    data = get_instagram_profile(handle)
+    if not isinstance(data, dict) or not isinstance(data.get("data"), dict):
+        raise BadUpstreamResponse(f"Unexpected Instagram profile response for {handle}")
+    user = data["data"].get("user")
+    if not isinstance(user, dict):
+        raise NotFound(f"No Instagram profile for {handle}")
+    return {
+        "handle": handle,
+        "username": user.get("username"),
+        "full_name": user.get("full_name"),
+        "biography": user.get("biography"),
+        "followers": (user.get("edge_followed_by") or {}).get("count"),
+        "following": (user.get("edge_follow") or {}).get("count"),
+        "profile_pic_url": user.get("profile_pic_url_hd"),
+        "bio_links": user.get("bio_links") or [],
+    }
+
+
+def instagram_reels(params):
+    handle = _required(params, "handle").lstrip("@")
+    try:
+        amount = min(int(params.get("amount") or DEFAULT_REEL_COUNT), MAX_REELS)
+    except ValueError:
+        raise BadRequest("amount must be an integer") from None
+    records = (
+        {"handle": handle, **reel_row(entry["media"])}
+        for entries in iter_reel_pages(handle, amount)
+        for entry in entries
+        if entry.get("media")
+    )
+    return {"handle": handle, "reels": _rows("instagram", records, params)}
+
+
+def pagespeed(params):
+    """The latest stored run for url and strategy; a new one with fresh=1, or when none is stored"""
+    url = _required(params, "url")
+    strategy = params.get("strategy") or STRATEGIES[0]
+    if strategy not in STRATEGIES:
+        raise BadRequest(f"strategy must be one of: {', '.join(STRATEGIES)}")
+    result = None if _flag(params, "fresh") else get_store().latest(url, strategy)
+    return result or analyze(url, strategy)
+
+
+ROUTES = {
+    "/v1/facebook/companies": facebook_companies,
+    "/v1/facebook/ads": facebook_ads,
+    "/v1/google/ads": google_ads,
+    "/v1/instagram/profile": instagram_profile,
+    "/v1/instagram/reels": instagram_reels,
+    "/v1/pagespeed": pagespeed,
+}
+
+
+# ========== ASGI ==========
+_executor = ThreadPoolExecutor(max_workers=API_WORKERS, thread_name_prefix="api")
+
+
+def _call(path, params):
+    """(status, payload) for one lookup; upstream failures map onto HTTP statuses"""
+    with timer("api_request_seconds", route=path):
+        try:
+            return 200, ROUTES[path](params)
+        except BadRequest as e:
+            return 400, {"error": str(e)}
+        except NotFound as e:
+            return 404, {"error": str(e)}
+        except BadUpstreamResponse as e:
+            return 502, {"error": str(e)}
+        except RateLimitExceeded as e:
+            return 429, {"error": str(e)}
+        except ApiError as e:
+            return 502, {"error": str(e), "upstream_status": e.status_code}
+        except Exception as e:
+            return 500, {"error": str(e) or type(e).__name__}
+
+
+async def _send(send, status, body, content_type="application/json", head=False):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type.encode()), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": b"" if head else body})
+
+
+def _authorized(headers):
+    return bool(API_TOKEN) and hmac.compare_digest(headers.get(b"authorization", b""), f"Bearer {API_TOKEN}".encode())
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            _executor.shutdown(wait=False, cancel_futures=True)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await _lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+    path, head = scope["path"].rstrip("/") or "/", scope["method"] == "HEAD"
+    if scope["method"] not in ("GET", "HEAD"):
+        await _send(send, 405, json.dumps({"error": "Only GET is supported"}).encode())
+        return
+    if path == "/healthz":
+        await _send(send, 200, b'{"ok": true}', head=head)
+        return
+    headers = dict(scope["headers"])
+    authorized = _authorized(headers)
+    if API_TOKEN and not authorized:
+        await _send(send, 401, json.dumps({"error": "Missing or invalid bearer token"}).encode(), head=head)
+        return
+    if path == "/metrics":
+        await _send(send, 200, get_metrics().prometheus_text().encode(), "text/plain; version=0.0.4", head)
+        return
+    if path not in ROUTES:
+        await _send(send, 404, json.dumps({"error": f"Unknown route: {path}", "routes": sorted(ROUTES)}).encode())
+        return
+
+    params = {name: values[-1] for name, values in parse_qs(scope["query_string"].decode("latin-1")).items()}
+    client = (scope.get("client") or ("unknown",))[0]
+    caller, priority = client, INTERACTIVE
+    if authorized:  # only token holders may attribute requests to a name of their choosing
+        caller = headers.get(b"x-caller", b"").decode("latin-1") or client
+        priority = BULK if headers.get(b"x-priority", b"").lower() == b"bulk" else INTERACTIVE
+    # Lookups block (cache, rate limiter, upstream); run them on the pool, as this caller
+    context = contextvars.copy_context()
+    context.run(set_caller, f"api:{caller}", priority)
+    status, payload = await asyncio.get_running_loop().run_in_executor(_executor, context.run, _call, path, params)
+    count("api_requests_total", route=path, status=str(status))
+    await _send(send, status, json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8"), head=head)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless JSON API for ads, reels and PageSpeed lookups")
+    parser.add_argument("--host", default=API_HOST, help="Interface to bind (default: loopback only)")
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--workers", type=int, default=1, help="Server processes; they share the on-disk cache")
+    args = parser.parse_args(argv)
+    try:
+        import uvicorn
+    except ImportError:
+        print("Serving the API needs an ASGI server: pip install uvicorn", file=sys.stderr)
+        return 1
+    uvicorn.run("api_server:app", host=args.host, port=args.port, workers=args.workers, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,534 @@
+"""Offline benchmarks: drive the apps against a local stub of the upstream APIs.
+
+    python bench/run.py                       # every scenario
+    python bench/run.py fb_ads_page main_tabs --latency-ms 100 --ads 2000
+    python bench/run.py --json results.json
+
+Each scenario runs in its own subprocess with an empty cache directory, and
+reports wall time, peak traced memory and upstream calls per endpoint.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from bench.stub_server import StubConfig, StubServer  # noqa: E402
+
+SCENARIOS = {}
+
+
+def scenario(fn):
+    SCENARIOS[fn.__name__] = fn
+    return fn
+
+
+# ========== SCENARIOS ==========
+# Each receives the parsed args and returns extra fields for its report.
+# App modules are imported inside the scenario, after the environment points at the stub.
+
+def _app(script):
+    from streamlit.testing.v1 import AppTest
+
+    return AppTest.from_file(os.path.join(REPO_DIR, script), default_timeout=600)
+
+
+def _step(steps, name, action):
+    started = time.perf_counter()
+    at = action()
+    steps[name] = round(time.perf_counter() - started, 3)
+    if at is not None and at.exception:
+        raise RuntimeError(f"{name}: {at.exception[0].value}")
+    return at
+
+
+def _button(at, prefix):
+    return next(button for button in at.button if button.label.startswith(prefix))
+
+
+@scenario
+def fb_ads_page(args):
+    """fb_ads.py: load one large advertiser by page ID, then page forward"""
+    steps = {}
+    at = _app("fb_ads.py")
+    _step(steps, "cold_start", at.run)
+    at.radio[0].set_value("📝 Enter Page ID")
+    _step(steps, "switch_mode", at.run)
+    at.text_input[0].set_value("2000")
+    _step(steps, "load_ads", _button(at, "🚀").click().run)
+    _step(steps, "next_page", _button(at, "Next").click().run)
+    _step(steps, "rerun", at.run)
+    rendered = len(at.subheader)
+    # Hashes every loaded creative's text and image the first time
+    collapse = next(box for box in at.checkbox if box.label == "Collapse variants")
+    _step(steps, "collapse_variants", collapse.check().run)
+    return {"steps": steps, "ads_rendered": rendered}
+
+
+@scenario
+def session_memory(args):
+    """fb_ads.py: up to args.sessions live sessions on three advertisers; memory should stay flat as sessions grow"""
+    import gc
+
+    from object_store import estimate_bytes, get_object_store
+
+    try:
+        import pyarrow
+    except ImportError:
+        pyarrow = None
+
+    checkpoints = sorted({1, max(1, args.sessions // 4), max(1, args.sessions // 2), args.sessions})
+    sessions, memory_mb, session_state_kb = [], {}, {}
+    steps = {}
+    started = time.perf_counter()
+    for i in range(args.sessions):
+        at = _app("fb_ads.py")
+        at.run()
+        at.radio[0].set_value("📝 Enter Page ID").run()
+        at.text_input[0].set_value(str(6000 + i % 3))
+        _button(at, "🚀").click().run()
+        at.selectbox(key="ads_page_size").set_value(50).run()
+        for _ in range(2):  # page forward, so each advertiser has a few hundred ads loaded
+            _button(at, "Next").click().run()
+        if at.exception:
+            raise RuntimeError(f"session {i}: {at.exception[0].value}")
+        # Keep what a server keeps per session; the rendered elements went to the browser
+        state = {key: at.session_state[key] for key in at.session_state}
+        sessions.append(at.session_state)
+        del at
+        if len(sessions) in checkpoints:
+            gc.collect()
+            # String columns live in Arrow's allocator, which tracemalloc does not see
+            arrow = pyarrow.total_allocated_bytes() if pyarrow else 0
+            memory_mb[len(sessions)] = round((tracemalloc.get_traced_memory()[0] + arrow) / 1e6, 1)
+            session_state_kb[len(sessions)] = round(estimate_bytes(state) / 1e3, 1)
+    steps["sessions"] = round(time.perf_counter() - started, 3)
+    shared = get_object_store().stats()
+    tables = shared["kinds"].get("facebook_ads", {"entries": 0, "bytes": 0})
+    return {
+        "steps": steps,
+        "memory_mb_by_sessions": memory_mb,
+        "session_state_kb": session_state_kb,
+        "shared_mb": round(shared["bytes"] / 1e6, 2),
+        # What the same tables would take if every session held its own copy, as session_state used to
+        "per_session_copies_mb": round(tables["bytes"] / max(1, tables["entries"]) * args.sessions / 1e6, 2),
+    }
+
+
+@scenario
+def fb_ads_search(args):
+    """fb_ads.py: search, then select the top result (exercises the speculative prefetch)"""
+    steps = {}
+    at = _app("fb_ads.py")
+    _step(steps, "cold_start", at.run)
+    at.text_input[0].set_value("nike")
+    _step(steps, "search", _button(at, "🔍").click().run)
+    time.sleep(args.think_time)  # the user reading results, while the prefetch runs
+    _step(steps, "select", _button(at, "Select").click().run)
+    return {"steps": steps}
+
+
+@scenario
+def fb_sync_resume(args):
+    """fb_sync.py: the first pull loses its second page; the next syncs must still store the whole history"""
+    from fb_sync import RECENT_PAGE_AGE, get_sync_store
+    from scrapecreators import get_company_ads
+
+    store = get_sync_store()
+    page_id = "2500"
+    failed = []
+
+    def flaky(pid, cursor):
+        if cursor and not failed:
+            failed.append(cursor)
+            return None
+        return get_company_ads(pid, cursor, fresh=True, max_age=RECENT_PAGE_AGE)
+
+    steps = {}
+    started = time.perf_counter()
+    first = store.sync(page_id, flaky)
+    steps["failed_pull"] = round(time.perf_counter() - started, 3)
+    syncs = [first]
+    started = time.perf_counter()
+    while not syncs[-1]["complete"] and len(syncs) < 10:
+        syncs.append(store.sync(page_id, flaky))
+    steps["resume"] = round(time.perf_counter() - started, 3)
+    stored = store.count(page_id)
+    if first["complete"] or stored != args.ads:
+        raise RuntimeError(f"stored {stored} of {args.ads} ads after {len(syncs)} syncs")
+    return {"steps": steps, "syncs": len(syncs), "ads_stored": stored, "pages": [sync["pages"] for sync in syncs]}
+
+
+@scenario
+def main_tabs(args):
+    """main.py: open every platform page once"""
+    steps = {}
+    at = _app("main.py")
+    _step(steps, "cold_start", at.run)
+    at.radio[0].set_value("📝 Enter Page ID").run()
+    at.text_input[0].set_value("3000")
+    _step(steps, "facebook", _button(at, "🚀").click().run)
+    _step(steps, "google_page", at.switch_page("google_ads.py").run)
+    at.text_input[0].set_value("example.com")
+    _step(steps, "google", at.run)
+    _step(steps, "instagram_page", at.switch_page("insta_complete.py").run)
+    at.number_input[0].set_value(args.reels)
+    at.text_input[0].set_value("brand")
+    _step(steps, "instagram", at.run)
+    return {"steps": steps}
+
+
+@scenario
+def cold_start(args):
+    """main.py: first run, then idle reruns; only the default page's modules should load"""
+    steps = {}
+    modules_before = len(sys.modules)
+    at = _app("main.py")
+    _step(steps, "first_run", at.run)
+    modules_loaded = len(sys.modules) - modules_before
+    started = time.perf_counter()
+    for _ in range(args.reruns):
+        at.run()
+    steps["rerun_mean"] = round((time.perf_counter() - started) / args.reruns, 4)
+    return {"steps": steps, "modules_loaded": modules_loaded}
+
+
+@scenario
+def google_ads(args):
+    """google_ads.py: one domain with many creatives"""
+    steps = {}
+    at = _app("google_ads.py")
+    _step(steps, "cold_start", at.run)
+    at.text_input[0].set_value("example.com")
+    _step(steps, "load_ads", at.run)
+    _step(steps, "rerun", at.run)
+    return {"steps": steps}
+
+
+@scenario
+def instagram(args):
+    """insta_complete.py: profile plus args.reels reels"""
+    steps = {}
+    at = _app("insta_complete.py")
+    _step(steps, "cold_start", at.run)
+    at.number_input[0].set_value(args.reels)
+    at.text_input[0].set_value("brand")
+    _step(steps, "load_reels", at.run)
+    _step(steps, "rerun", at.run)
+    return {"steps": steps}
+
+
+@scenario
+def watched_dashboards(args):
+    """watchlist.py refreshes one target per platform, then each dashboard opens it from local data"""
+    from rate_limit import get_scheduler
+    from watchlist import WatchlistDaemon, get_watchlist
+
+    steps = {}
+    watchlist = get_watchlist()
+    watchlist.add("facebook", "5000")
+    watchlist.add("google", "example.com")
+    watchlist.add("instagram", "brand")
+    _step(steps, "daemon_refresh", WatchlistDaemon(watchlist).run_once)
+
+    at = _app("fb_ads.py")
+    at.run()
+    at.radio[0].set_value("📝 Enter Page ID").run()
+    at.text_input[0].set_value("5000")
+    _step(steps, "facebook", _button(at, "🚀").click().run)
+    at = _app("google_ads.py")
+    at.run()
+    at.text_input[0].set_value("example.com")
+    _step(steps, "google", at.run)
+    at = _app("insta_complete.py")
+    at.run()
+    at.text_input[0].set_value("brand")
+    _step(steps, "instagram", at.run)
+    sessions = get_scheduler().bucket.ledger_summary(by="session")
+    interactive = sum(row["calls"] for row in sessions if row["session"] != "watchlist")
+    return {"steps": steps, "interactive_upstream_calls": interactive}
+
+
+@scenario
+def pagespeed(args):
+    """pagespeed_app.py: run one analysis"""
+    steps = {}
+    at = _app("pagespeed_app.py")
+    _step(steps, "cold_start", at.run)
+    _step(steps, "analyze", _button(at, "Run Analysis").click().run)
+    return {"steps": steps}
+
+
+@scenario
+def export_large(args):
+    """export.py: every ad of one advertiser in each format; peak memory should not grow with --ads"""
+    from export import FORMATS, export, facebook_records
+
+    steps, peaks, sizes = {}, {}, {}
+    output_dir = tempfile.mkdtemp(prefix="bench-export-")
+    for fmt in FORMATS:
+        path = os.path.join(output_dir, f"ads.{fmt}")
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        started = time.perf_counter()
+        with open(path, "wb") as out:
+            rows = export("facebook", facebook_records("5000"), out, fmt)
+        steps[fmt] = round(time.perf_counter() - started, 3)
+        peaks[fmt] = round((tracemalloc.get_traced_memory()[1] - baseline) / 1e6, 1)
+        sizes[fmt] = os.path.getsize(path)
+    return {"steps": steps, "rows": rows, "peak_mb_by_format": peaks, "bytes_by_format": sizes}
+
+
+BENCH_API_TOKEN = "bench"
+
+
+def _start_api_server():
+    """api_server.py in its own process (as deployed), against the stub and this run's cache; returns (process, URL)"""
+    import socket
+
+    import requests
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_DIR, "api_server.py"), "--host", "127.0.0.1", "--port", str(port)],
+        cwd=REPO_DIR,
+        env={**os.environ, "API_TOKEN": BENCH_API_TOKEN},
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while True:
+        try:
+            requests.get(base_url + "/healthz", timeout=1).raise_for_status()
+            return process, base_url
+        except requests.RequestException:
+            if process.poll() is not None or time.monotonic() > deadline:
+                process.kill()
+                raise RuntimeError("api_server.py did not start")
+            time.sleep(0.1)
+
+
+@scenario
+def api_throughput(args):
+    """api_server.py: args.sessions clients cycling through every route, next to reruns of the Google Ads page"""
+    import requests
+
+    process, base_url = _start_api_server()
+    paths = [
+        "/v1/facebook/companies?query=nike",
+        "/v1/facebook/ads?page_id=4000",
+        "/v1/google/ads?domain=example.com",
+        "/v1/instagram/profile?handle=brand",
+        f"/v1/instagram/reels?handle=brand&amount={args.reels}",
+        "/v1/pagespeed?url=https://example.com/",
+    ]
+    auth = {"Authorization": f"Bearer {BENCH_API_TOKEN}"}
+    steps = {}
+    started = time.perf_counter()
+    for path in paths:  # the first call to each route fills the cache
+        requests.get(base_url + path, headers=auth, timeout=600).raise_for_status()
+    steps["warm"] = round(time.perf_counter() - started, 3)
+
+    per_client = max(1, args.api_requests // args.sessions)
+    latencies, failures = [], []
+    lock = threading.Lock()
+
+    def client(i):
+        session = requests.Session()
+        session.headers.update(auth, **{"X-Caller": f"bench-{i}"})
+        mine = []
+        for n in range(per_client):
+            sent = time.perf_counter()
+            response = session.get(base_url + paths[(i + n) % len(paths)], timeout=600)
+            mine.append(time.perf_counter() - sent)
+            if response.status_code != 200:
+                with lock:
+                    failures.append(response.status_code)
+        with lock:
+            latencies.extend(mine)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(args.sessions)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    steps["load"] = round(elapsed, 3)
+    process.terminate()
+    process.wait()
+    latencies.sort()
+
+    # The same Google lookup through Streamlit: one script rerun per interaction
+    at = _app("google_ads.py")
+    at.run()
+    at.text_input[0].set_value("example.com")
+    at.run()
+    started = time.perf_counter()
+    for _ in range(args.reruns):
+        at.run()
+    streamlit_rate = args.reruns / (time.perf_counter() - started)
+    return {
+        "steps": steps,
+        "api_requests": len(latencies),
+        "api_failures": len(failures),
+        "api_requests_per_s": round(len(latencies) / elapsed, 1),
+        "api_p50_ms": round(latencies[len(latencies) // 2] * 1000, 1),
+        "api_p95_ms": round(latencies[int(len(latencies) * 0.95)] * 1000, 1),
+        "streamlit_google_reruns_per_s": round(streamlit_rate, 1),
+    }
+
+
+@scenario
+def concurrent_sessions(args):
+    """args.sessions sessions at once, each opening one of a few popular brands on every platform"""
+    from rate_limit import INTERACTIVE, set_caller
+    from scrapecreators import get_company_ads, get_google_ads, get_instagram_profile, search_companies
+
+    brands = ["nike", "adidas", "puma"]
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def session(i):
+        set_caller(f"bench-{i}", INTERACTIVE)
+        brand = brands[i % len(brands)]
+        started = time.perf_counter()
+        try:
+            search_companies(brand)
+            get_company_ads(str(4000 + i % len(brands)))
+            get_google_ads(f"{brand}.com")
+            get_instagram_profile(brand)
+        except Exception as e:
+            with lock:
+                errors.append(repr(e))
+            return
+        with lock:
+            latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(args.sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies.sort()
+    return {
+        "sessions": args.sessions,
+        "errors": len(errors),
+        "session_p50_s": round(latencies[len(latencies) // 2], 3) if latencies else None,
+        "session_max_s": round(latencies[-1], 3) if latencies else None,
+    }
+
+
+# ========== RUNNER ==========
+def run_child(name, args):
+    server = StubServer(StubConfig(
+        latency=args.latency_ms / 1000, ads=args.ads, page_size=args.page_size, google_ads=args.google_ads,
+        reels=args.reels, text_bytes=args.text_bytes, image_size=args.image_size,
+    )).start()
+    cache_dir = tempfile.mkdtemp(prefix="bench-cache-")
+    os.environ.update({
+        "SCRAPECREATORS_BASE_URL": server.base_url,
+        "SCRAPECREATORS_API_KEY": "bench",
+        "PAGESPEED_URL": server.pagespeed_url,
+        "ADS_CACHE_DIR": cache_dir,
+        # The real limits would dominate every timing; the bench measures the app, not the budget
+        "SCRAPECREATORS_RATE": "100000",
+        "SCRAPECREATORS_BURST": "100000",
+    })
+    os.chdir(REPO_DIR)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    error = None
+    try:
+        extra = SCENARIOS[name](args)
+    except Exception as e:
+        extra, error = {}, repr(e)
+    wall = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    server.stop()
+    return {
+        "scenario": name,
+        "wall_s": round(wall, 3),
+        "peak_mb": round(peak / 1024 / 1024, 1),
+        "upstream_calls": server.call_counts(),
+        "error": error,
+        **extra,
+    }
+
+
+def print_report(report):
+    status = "FAILED " + report["error"] if report.get("error") else "ok"
+    print(f"{report['scenario']:<20} {report['wall_s']:>8.2f}s {report['peak_mb']:>8.1f} MB  {status}")
+    calls = ", ".join(f"{route}={count}" for route, count in sorted(report["upstream_calls"].items()))
+    print(f"{'':<20} calls: {calls or 'none'}")
+    if report.get("steps"):
+        print(f"{'':<20} steps: " + ", ".join(f"{step}={seconds}s" for step, seconds in report["steps"].items()))
+    extra = {key: value for key, value in report.items()
+             if key not in ("scenario", "wall_s", "peak_mb", "upstream_calls", "error", "steps")}
+    if extra:
+        print(f"{'':<20} " + ", ".join(f"{key}={value}" for key, value in extra.items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks against a local API stub")
+    parser.add_argument("scenarios", nargs="*", help=f"Any of {', '.join(SCENARIOS)}; defaults to all")
+    parser.add_argument("--latency-ms", type=float, default=50, help="Added to every stub API response")
+    parser.add_argument("--ads", type=int, default=1000, help="Ads per Facebook advertiser")
+    parser.add_argument("--page-size", type=int, default=30, help="Ads per upstream page")
+    parser.add_argument("--google-ads", type=int, default=200)
+    parser.add_argument("--reels", type=int, default=100)
+    parser.add_argument("--text-bytes", type=int, default=200, help="Body text per ad/reel, to scale payloads")
+    parser.add_argument("--image-size", type=int, default=1080, help="Edge in pixels of every served image")
+    parser.add_argument("--sessions", type=int, default=50, help="Sessions for concurrent_sessions, api_throughput and session_memory")
+    parser.add_argument("--api-requests", type=int, default=2000, help="Requests spread over the api_throughput clients")
+    parser.add_argument("--reruns", type=int, default=20, help="Idle reruns for cold_start and api_throughput")
+    parser.add_argument("--think-time", type=float, default=1.0, help="Seconds between search and select")
+    parser.add_argument("--json", help="Also write every report to this file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario: {', '.join(unknown)}")
+    if args.child:
+        print(json.dumps(run_child(args.child, args)))
+        return 0
+
+    forwarded = [arg for arg in (argv if argv is not None else sys.argv[1:]) if arg not in SCENARIOS]
+    if "--json" in forwarded:
+        index = forwarded.index("--json")
+        del forwarded[index:index + 2]
+    reports = []
+    for name in args.scenarios or list(SCENARIOS):
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", name, *forwarded],
+            capture_output=True, text=True,
+        )
+        lines = completed.stdout.strip().splitlines()
+        if completed.returncode != 0 or not lines:
+            report = {"scenario": name, "wall_s": 0.0, "peak_mb": 0.0, "upstream_calls": {},
+                      "error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "no output"}
+        else:
+            report = json.loads(lines[-1])
+        print_report(report)
+        reports.append(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+    return 1 if any(report.get("error") for report in reports) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
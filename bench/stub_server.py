@@ -0,0 +1,248 @@
+"""Local stand-in for the ScrapeCreators, PageSpeed and media CDN endpoints.
+
+Responses are synthetic but shaped like the real APIs. To replay a recorded
+response instead, save it as bench/fixtures/<name>.json, where name is one of
+FIXTURE_NAMES; it is served verbatim for that endpoint.
+"""
+import io
+import json
+import os
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from PIL import Image
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+ROUTES = {
+    "/v1/facebook/adLibrary/search/companies": "companies_search",
+    "/v1/facebook/adLibrary/company/ads": "company_ads",
+    "/v1/google/company/ads": "google_ads",
+    "/v1/instagram/profile": "instagram_profile",
+    "/v1/instagram/user/reels/simple": "instagram_reels_simple",
+    "/v1/instagram/user/reels": "instagram_reels",
+    "/pagespeed": "pagespeed",
+}
+FIXTURE_NAMES = sorted(ROUTES.values())
+PLATFORMS = [["FACEBOOK", "INSTAGRAM"], ["FACEBOOK"], ["INSTAGRAM", "MESSENGER"], ["AUDIENCE_NETWORK"]]
+
+
+class StubConfig:
+    def __init__(self, latency=0.05, ads=1000, page_size=30, search_results=10, google_ads=200, reels=500,
+                 text_bytes=200, image_size=1080):
+        self.latency = latency  # seconds added to every API response
+        self.ads = ads  # ads per advertiser
+        self.page_size = page_size
+        self.search_results = search_results
+        self.google_ads = google_ads
+        self.reels = reels  # reels available per handle
+        self.text_bytes = text_bytes  # padding per ad/reel body, to scale payload size
+        self.image_size = image_size  # edge of the JPEG served for every media URL
+
+
+def _load_fixture(name):
+    path = os.path.join(FIXTURE_DIR, f"{name}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _jpeg(edge):
+    # Gradients rather than a flat fill, so decode and re-encode do realistic work
+    gradient = Image.linear_gradient("L").resize((edge, edge))
+    image = Image.merge("RGB", (gradient, gradient.transpose(Image.Transpose.ROTATE_90), Image.new("L", (edge, edge), 128)))
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=85)
+    return buffer.getvalue()
+
+
+class StubApi:
+    """Builds responses for each route from a StubConfig"""
+
+    def __init__(self, config, base_url):
+        self.config = config
+        self.base_url = base_url
+        self.fixtures = {name: _load_fixture(name) for name in FIXTURE_NAMES}
+
+    def _text(self, prefix):
+        return (prefix + " " + "lorem ipsum " * (self.config.text_bytes // 12 + 1))[: self.config.text_bytes]
+
+    def _media(self, kind, key):
+        return f"{self.base_url}/media/{kind}-{key}.jpg"
+
+    def companies_search(self, params):
+        query = params.get("query", "brand")
+        return {"searchResults": [
+            {"name": f"{query.title()} {i}", "page_id": str(1000 + i), "likes": (self.config.search_results - i) * 10_000,
+             "verification": "VERIFIED" if i % 3 == 0 else "NOT_VERIFIED", "category": "Retail",
+             "entity_type": "PERSON_PROFILE", "page_alias": f"{query}{i}", "ig_followers": i * 1000,
+             "image_uri": self._media("logo", 1000 + i)}
+            for i in range(self.config.search_results)
+        ]}
+
+    def _ad(self, page_id, i):
+        return {
+            "ad_archive_id": f"{page_id}{i:06d}",
+            "is_active": i % 4 != 0,
+            "start_date_string": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime(1_700_000_000 - i * 3600)),
+            "impressions": {"lower_bound": str(i * 100), "upper_bound": str(i * 100 + 999)},
+            "publisher_platform": PLATFORMS[i % len(PLATFORMS)],
+            "url": f"https://www.facebook.com/ads/library/?id={page_id}{i:06d}",
+            "snapshot": {
+                "page_name": f"Page {page_id}",
+                "body": {"text": self._text(f"Ad {i}")},
+                "title": f"Title {i}",
+                "cta_text": "Shop now",
+                "display_format": "IMAGE" if i % 5 else "VIDEO",
+                "link_url": f"https://example.com/p/{i}",
+                "cards": [{
+                    "title": f"Card {i}", "body": self._text("Card"), "cta_text": "Shop now",
+                    "original_image_url": self._media("ad", f"{page_id}-{i}"),
+                    "link_caption": "example.com", "link_description": "Description",
+                    **({
+                        "video_hd_url": self._media("video", f"{page_id}-{i}"),
+                        "video_preview_image_url": self._media("preview", f"{page_id}-{i}"),
+                    } if i % 5 == 0 else {}),
+                }],
+            },
+        }
+
+    def company_ads(self, params):
+        page_id = params.get("pageId", "0")
+        start = int(params.get("cursor") or 0)
+        end = min(start + self.config.page_size, self.config.ads)
+        return {
+            "results": [self._ad(page_id, i) for i in range(start, end)],
+            "cursor": str(end) if end < self.config.ads else None,
+        }
+
+    def google_ads(self, params):
+        domain = params.get("domain", "example.com")
+        return {"ads": [
+            {"creativeId": f"CR{i:08d}", "advertiserId": "AR0001", "format": ["text", "image", "video"][i % 3],
+             "firstShown": "2024-01-01T00:00:00Z", "lastShown": "2024-06-01T00:00:00Z",
+             "adUrl": f"https://adstransparency.google.com/advertiser/AR0001/creative/CR{i:08d}?domain={domain}"}
+            for i in range(self.config.google_ads)
+        ]}
+
+    def instagram_profile(self, params):
+        handle = params.get("handle", "brand")
+        return {"success": True, "data": {"user": {
+            "username": handle, "full_name": handle.title(), "biography": self._text("Bio"),
+            "profile_pic_url_hd": self._media("profile", handle),
+            "edge_followed_by": {"count": 1_234_567}, "edge_follow": {"count": 321},
+        }}}
+
+    def _reel(self, handle, i):
+        return {
+            "code": f"{handle}{i:05d}", "caption": {"text": self._text(f"Reel {i}")},
+            "taken_at": 1_700_000_000 - i * 86_400, "play_count": i * 1000, "like_count": i * 100,
+            "share_count": i * 10, "comment_count": i, "display_uri": self._media("reel", f"{handle}-{i}"),
+            "media_type": 2,
+        }
+
+    def instagram_reels_simple(self, params):
+        handle = params.get("handle", "brand")
+        amount = min(int(params.get("amount") or 12), self.config.reels)
+        return [{"media": self._reel(handle, i)} for i in range(amount)]
+
+    def instagram_reels(self, params):
+        handle = params.get("handle", "brand")
+        start = int(params.get("max_id") or 0)
+        end = min(start + 12, self.config.reels)
+        return {
+            "items": [self._reel(handle, i) for i in range(start, end)],
+            "paging_info": {"max_id": str(end), "more_available": end < self.config.reels},
+        }
+
+    def pagespeed(self, params):
+        audits = {key: {"displayValue": "1.2 s", "numericValue": 1200, "title": key}
+                  for key in ["speed-index", "first-contentful-paint", "largest-contentful-paint", "interactive",
+                              "total-blocking-time", "cumulative-layout-shift", "dom-size", "bootup-time"]}
+        return {"lighthouseResult": {
+            "fetchTime": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime()),
+            "categories": {"performance": {"score": 0.87}},
+            "audits": audits,
+        }}
+
+    def respond(self, route, params):
+        fixture = self.fixtures.get(route)
+        return fixture if fixture is not None else getattr(self, route)(params)
+
+
+class StubServer:
+    """Threaded HTTP server on localhost; counts every request by route"""
+
+    def __init__(self, config=None, port=0):
+        self.config = config or StubConfig()
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        self.api = StubApi(self.config, self.base_url)
+        self._image = _jpeg(self.config.image_size)
+        self._thread = None
+
+    @property
+    def pagespeed_url(self):
+        return f"{self.base_url}/pagespeed"
+
+    def _count(self, route):
+        with self._lock:
+            self.calls[route] += 1
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real APIs behind the pooled session
+
+            def _send(self, status, body, content_type):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path.startswith("/media/"):
+                    stub._count("media")
+                    self._send(200, stub._image, "image/jpeg")
+                    return
+                route = ROUTES.get(url.path)
+                if route is None:
+                    self._send(404, b'{"error": "not found"}', "application/json")
+                    return
+                stub._count(route)
+                params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+                time.sleep(stub.config.latency)
+                body = json.dumps(stub.api.respond(route, params)).encode("utf-8")
+                self._send(200, body, "application/json")
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_calls(self):
+        with self._lock:
+            self.calls.clear()
+
+    def call_counts(self):
+        with self._lock:
+            return dict(self.calls)
@@ -0,0 +1,337 @@
+import hashlib
+import io
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+from media_prefetch import MediaPrefetcher, download_media
+from response_cache import CACHE_DIR
+from thumbnails import read_thumbnail, url_digest
+
+# ========== CONFIG ==========
+HASH_DB_PATH = os.path.join(CACHE_DIR, "creative_hashes.sqlite3")
+SHINGLE_SIZE = 5  # characters
+NUM_PERM = 64
+TEXT_BANDS = 16  # 16 bands x 4 rows: pairs around 0.5 Jaccard or more become candidates
+TEXT_SIMILARITY = 0.8  # estimated Jaccard needed to call two ad texts variants
+IMAGE_DISTANCE = 6  # max differing dHash bits for near-identical images
+IMAGE_BANDS = 8  # must exceed IMAGE_DISTANCE so near pairs always share a band (pigeonhole)
+IMAGE_RETRY_AFTER = 6 * 3600  # seconds before an image that failed to download or decode is tried again
+
+_PRIME = (1 << 31) - 1
+_rng = np.random.default_rng(20240501)
+_PERM_A = _rng.integers(1, _PRIME, NUM_PERM, dtype=np.int64)
+_PERM_B = _rng.integers(0, _PRIME, NUM_PERM, dtype=np.int64)
+
+
+# ========== SIGNATURES ==========
+def normalize_text(text):
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", "", (text or "").lower())).strip()
+
+
+def minhash(text):
+    """MinHash signature of the text's character shingles, or None for empty text"""
+    text = normalize_text(text)
+    if not text:
+        return None
+    grams = {text[i:i + SHINGLE_SIZE] for i in range(max(1, len(text) - SHINGLE_SIZE + 1))}
+    shingles = np.fromiter((zlib.crc32(gram.encode("utf-8")) for gram in grams), dtype=np.int64, count=len(grams))
+    # (a * x + b) mod p for every permutation and shingle at once; fits int64 since a, x < 2^32
+    return ((np.outer(_PERM_A, shingles) + _PERM_B[:, None]) % _PRIME).min(axis=1)
+
+
+def dhash(image, size=8):
+    """64-bit difference hash: does brightness rise or fall between neighbouring pixels"""
+    pixels = np.asarray(image.convert("L").resize((size + 1, size), Image.LANCZOS), dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def _signed(value):
+    # SQLite integers are signed 64-bit
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+class HashStore:
+    """Persisted image dHashes (by URL digest) and text MinHash signatures (by text digest)"""
+
+    def __init__(self, path=HASH_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._connect().executescript(
+            "CREATE TABLE IF NOT EXISTS image_hashes (digest TEXT PRIMARY KEY, dhash INTEGER NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS text_signatures (digest TEXT PRIMARY KEY, signature BLOB NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS image_failures (digest TEXT PRIMARY KEY, failed_at REAL NOT NULL);"
+        )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _lookup(self, table, column, digests):
+        found = {}
+        digests = list(digests)
+        conn = self._connect()
+        for i in range(0, len(digests), 500):
+            chunk = digests[i:i + 500]
+            rows = conn.execute(
+                f"SELECT digest, {column} FROM {table} WHERE digest IN ({', '.join('?' * len(chunk))})", chunk
+            )
+            found.update(rows.fetchall())
+        return found
+
+    def image_hashes(self, digests):
+        return {digest: value & ((1 << 64) - 1) for digest, value in self._lookup("image_hashes", "dhash", digests).items()}
+
+    def save_image_hashes(self, hashes):
+        with self._connect() as conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT OR REPLACE INTO image_hashes (digest, dhash) VALUES (?, ?)",
+                [(digest, _signed(value)) for digest, value in hashes.items()],
+            )
+
+    def failed_images(self, digests, max_age=IMAGE_RETRY_AFTER):
+        """Digests among digests whose image failed to hash within the last max_age seconds"""
+        cutoff = time.time() - max_age
+        found = self._lookup("image_failures", "failed_at", digests)
+        return {digest for digest, failed_at in found.items() if failed_at > cutoff}
+
+    def save_image_failures(self, digests):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT OR REPLACE INTO image_failures (digest, failed_at) VALUES (?, ?)", [(digest, now) for digest in digests]
+            )
+
+    def text_signatures(self, digests):
+        return {
+            digest: np.frombuffer(blob, dtype=np.int64)
+            for digest, blob in self._lookup("text_signatures", "signature", digests).items()
+        }
+
+    def save_text_signatures(self, signatures):
+        with self._connect() as conn:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT OR REPLACE INTO text_signatures (digest, signature) VALUES (?, ?)",
+                [(digest, signature.tobytes()) for digest, signature in signatures.items()],
+            )
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_hash_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = HashStore()
+    return _store
+
+
+def text_signatures(texts, store=None):
+    """MinHash signature per text (None when empty), computing only those not stored yet"""
+    store = store or get_hash_store()
+    digests = [hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest() for text in texts]
+    known = store.text_signatures(set(digests))
+    missing = {}
+    for digest, text in zip(digests, texts):
+        if digest not in known and digest not in missing:
+            signature = minhash(text)
+            if signature is not None:
+                missing[digest] = signature
+    if missing:
+        store.save_text_signatures(missing)
+        known.update(missing)
+    return [known.get(digest) for digest in digests]
+
+
+def image_dhash(url):
+    """dHash of the image at url, from the cached thumbnail if there is one, else None on failure"""
+    data = read_thumbnail(url, "logo")
+    if data is None:
+        data = download_media(url)
+        if data is None:
+            return None
+    image = Image.open(io.BytesIO(data))
+    # A 9x8 hash needs nothing like full resolution; JPEGs decode at 1/8 scale instead
+    image.draft("L", (64, 64))
+    return dhash(image)
+
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_hash_prefetcher():
+    """MediaPrefetcher whose jobs download and hash images without building thumbnails"""
+    global _prefetcher
+    if _prefetcher is None:
+        with _prefetcher_lock:
+            if _prefetcher is None:
+                _prefetcher = MediaPrefetcher(loader=image_dhash)
+    return _prefetcher
+
+
+def image_hashes(urls, store=None):
+    """dHash per image URL (None if absent or undownloadable), hashing only images not stored yet"""
+    store = store or get_hash_store()
+    digests = {url: url_digest(url) for url in urls if url}
+    known = store.image_hashes(set(digests.values()))
+    # Images that recently failed are not retried on every rerun; those ads cluster on text alone
+    failed = store.failed_images({digest for digest in digests.values() if digest not in known})
+    missing = [url for url, digest in digests.items() if digest not in known and digest not in failed]
+    prefetcher = get_hash_prefetcher()
+    prefetcher.prefetch(missing)
+    computed, failures = {}, []
+    for url in missing:
+        try:
+            value = prefetcher.get(url)
+        except Exception:
+            value = None  # unreadable or timed out
+        if value is None:
+            failures.append(digests[url])
+        else:
+            computed[digests[url]] = value
+    if computed:
+        store.save_image_hashes(computed)
+        known.update(computed)
+    if failures:
+        store.save_image_failures(failures)
+    return [known.get(digests[url]) if url else None for url in urls]
+
+
+# ========== CLUSTERING ==========
+class _UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, item):
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)
+
+
+def _link_buckets(buckets, values, close, union_find):
+    """Union each bucket member with the first earlier representative close to it.
+
+    Comparing against one representative per match group rather than every
+    pair keeps a bucket of many identical variants linear; close(block, value)
+    checks a value against all representatives in one numpy operation.
+    """
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        block = values[members]
+        representatives = np.empty_like(block)
+        owners = []
+        for position, item in enumerate(members):
+            if owners:
+                matches = close(representatives[:len(owners)], block[position])
+                if matches.any():
+                    union_find.union(owners[matches.argmax()], item)
+                    continue
+            representatives[len(owners)] = block[position]
+            owners.append(item)
+
+
+def _text_close(block, signature):
+    return (block == signature).sum(axis=1) >= TEXT_SIMILARITY * NUM_PERM
+
+
+def _image_close(block, value):
+    return np.bitwise_count(block ^ value) <= IMAGE_DISTANCE
+
+
+def cluster_ids(signatures, hashes):
+    """Cluster id per creative; creatives join when their text or their image is a near-duplicate.
+
+    Candidates come from LSH buckets (MinHash bands for text, dHash bit bands
+    for images), so the cost grows with the number of creatives, not pairs.
+    """
+    count = len(signatures)
+    union_find = _UnionFind(count)
+
+    rows = NUM_PERM // TEXT_BANDS
+    matrix = np.zeros((count, NUM_PERM), dtype=np.int64)
+    buckets = defaultdict(list)
+    for i, signature in enumerate(signatures):
+        if signature is not None:
+            matrix[i] = signature
+            for band in range(TEXT_BANDS):
+                buckets[band, signature[band * rows:(band + 1) * rows].tobytes()].append(i)
+    _link_buckets(buckets, matrix, _text_close, union_find)
+
+    # Identical image hashes first, then near ones among the distinct hashes
+    by_hash = defaultdict(list)
+    for i, value in enumerate(hashes):
+        if value is not None:
+            by_hash[value].append(i)
+    for members in by_hash.values():
+        for item in members[1:]:
+            union_find.union(members[0], item)
+    distinct = list(by_hash)
+    bits = 64 // IMAGE_BANDS
+    buckets = defaultdict(list)
+    for i, value in enumerate(distinct):
+        for band in range(IMAGE_BANDS):
+            buckets[band, (value >> (band * bits)) & ((1 << bits) - 1)].append(i)
+    hash_union = _UnionFind(len(distinct))
+    _link_buckets(buckets, np.array(distinct, dtype=np.uint64), _image_close, hash_union)
+    for i, value in enumerate(distinct):
+        root = hash_union.find(i)
+        if root != i:
+            union_find.union(by_hash[distinct[root]][0], by_hash[value][0])
+
+    return [union_find.find(i) for i in range(count)]
+
+
+def creative_text(frame):
+    return (
+        frame["body_text"].fillna("") + " " + frame["card_title"].fillna("") + " " + frame["card_body"].fillna("")
+    ).tolist()
+
+
+def assign_clusters(frame, with_images=True):
+    """Cluster id per row of a facebook_ads_frame, as a Series on the frame's index"""
+    signatures = text_signatures(creative_text(frame))
+    if with_images:
+        urls = frame["original_image_url"]
+        hashes = image_hashes(urls.astype(object).where(urls.notna(), None).tolist())
+    else:
+        hashes = [None] * len(frame)
+    return pd.Series(cluster_ids(signatures, hashes), index=frame.index, dtype="int64")
+
+
+def collapse_variants(frame, clusters):
+    """First row of each cluster in frame's order, with a `variants` count of its rows in frame"""
+    assigned = clusters.loc[frame.index]
+    first = ~assigned.duplicated()
+    collapsed = frame[first].copy()
+    collapsed["variants"] = assigned[first].map(assigned.value_counts()).astype("int64")
+    return collapsed
@@ -0,0 +1,259 @@
+"""Local full-text index of every ad creative and reel caption fetched from the API.
+
+    python creative_index.py --rebuild    # re-index everything still in the response cache
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import zlib
+from datetime import datetime, timezone
+
+from response_cache import CACHE_DIR, CACHE_PATH
+from scrapecreators import COMPANY_ADS, GOOGLE_ADS, INSTAGRAM_REELS, INSTAGRAM_REELS_PAGED
+
+# ========== CONFIG ==========
+INDEX_PATH = os.path.join(CACHE_DIR, "creatives.sqlite3")
+PLATFORMS = ["facebook", "google", "instagram"]
+# bm25 column weights for (brand, title, body, cta)
+RANK_WEIGHTS = (4.0, 2.0, 1.0, 1.0)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS creatives (
+    id INTEGER PRIMARY KEY,
+    uid TEXT NOT NULL UNIQUE,
+    platform TEXT NOT NULL,
+    brand TEXT,
+    title TEXT,
+    body TEXT,
+    cta TEXT,
+    date TEXT,
+    url TEXT
+);
+CREATE INDEX IF NOT EXISTS creatives_by_platform ON creatives (platform, date);
+CREATE VIRTUAL TABLE IF NOT EXISTS creatives_fts USING fts5(
+    brand, title, body, cta, content='creatives', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS creatives_ai AFTER INSERT ON creatives BEGIN
+    INSERT INTO creatives_fts (rowid, brand, title, body, cta) VALUES (new.id, new.brand, new.title, new.body, new.cta);
+END;
+CREATE TRIGGER IF NOT EXISTS creatives_ad AFTER DELETE ON creatives BEGIN
+    INSERT INTO creatives_fts (creatives_fts, rowid, brand, title, body, cta)
+    VALUES ('delete', old.id, old.brand, old.title, old.body, old.cta);
+END;
+CREATE TRIGGER IF NOT EXISTS creatives_au AFTER UPDATE ON creatives BEGIN
+    INSERT INTO creatives_fts (creatives_fts, rowid, brand, title, body, cta)
+    VALUES ('delete', old.id, old.brand, old.title, old.body, old.cta);
+    INSERT INTO creatives_fts (rowid, brand, title, body, cta) VALUES (new.id, new.brand, new.title, new.body, new.cta);
+END;
+"""
+
+
+# ========== EXTRACTION ==========
+def _text(value):
+    if isinstance(value, dict):
+        value = value.get("text")
+    return value.strip() if isinstance(value, str) and value.strip() else None
+
+
+def _join(values):
+    return "\n".join(dict.fromkeys(value for value in values if value)) or None
+
+
+def facebook_creatives(results):
+    for ad in results:
+        if not ad.get("ad_archive_id"):
+            continue  # without an id it would overwrite every other id-less creative
+        snapshot = ad.get("snapshot") or {}
+        cards = snapshot.get("cards") or []
+        yield {
+            "uid": f"facebook:{ad['ad_archive_id']}",
+            "platform": "facebook",
+            "brand": snapshot.get("page_name"),
+            "title": _join([_text(snapshot.get("title"))] + [_text(card.get("title")) for card in cards]),
+            "body": _join(
+                [_text(snapshot.get("body")), _text(snapshot.get("caption"))]
+                + [_text(card.get(key)) for card in cards for key in ("body", "link_description")]
+            ),
+            "cta": _join([_text(snapshot.get("cta_text"))] + [_text(card.get("cta_text")) for card in cards]),
+            "date": ad.get("start_date_string"),
+            "url": ad.get("url"),
+        }
+
+
+def google_creatives(ads, domain):
+    for ad in ads:
+        if not ad.get("creativeId"):
+            continue
+        yield {
+            "uid": f"google:{ad['creativeId']}",
+            "platform": "google",
+            "brand": domain,
+            "title": _join([ad.get("format") and f"{ad['format']} ad", ad.get("advertiserName")]),
+            "body": _join([ad.get("advertiserId"), ad.get("creativeId")]),
+            "cta": None,
+            "date": ad.get("lastShown") or ad.get("firstShown"),
+            "url": ad.get("adUrl"),
+        }
+
+
+def instagram_creatives(items, handle):
+    for item in items:
+        media = item.get("media") or item
+        media_id = media.get("code") or media.get("pk") or media.get("id")
+        if not media_id:
+            continue
+        taken_at = media.get("taken_at")
+        yield {
+            "uid": f"instagram:{media_id}",
+            "platform": "instagram",
+            "brand": handle,
+            "title": None,
+            "body": _text(media.get("caption")),
+            "cta": None,
+            "date": datetime.fromtimestamp(taken_at, timezone.utc).isoformat() if isinstance(taken_at, (int, float)) else None,
+            "url": f"https://www.instagram.com/reel/{media['code']}/" if media.get("code") else None,
+        }
+
+
+def creatives_from_response(endpoint, params, data):
+    """Creatives in one API response, or nothing for endpoints that carry none"""
+    if endpoint == COMPANY_ADS and isinstance(data, dict):
+        return facebook_creatives(data.get("results") or [])
+    if endpoint == GOOGLE_ADS and isinstance(data, dict):
+        return google_creatives(data.get("ads") or [], params.get("domain"))
+    if endpoint == INSTAGRAM_REELS and isinstance(data, list):
+        return instagram_creatives(data, params.get("handle"))
+    if endpoint == INSTAGRAM_REELS_PAGED and isinstance(data, dict):
+        return instagram_creatives(data.get("items") or [], params.get("handle"))
+    return []
+
+
+def match_query(text):
+    """Free text to an FTS5 query: every word must match, the last one as a prefix"""
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " AND ".join(terms)
+
+
+class CreativeIndex:
+    """SQLite FTS5 index of creatives, upserted by uid as responses arrive"""
+
+    def __init__(self, path=INDEX_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, creatives):
+        rows = [
+            (c["uid"], c["platform"], c["brand"], c["title"], c["body"], c["cta"], c["date"], c["url"])
+            for c in creatives
+        ]
+        if not rows:
+            return 0
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN")
+            # Only rows whose text changed are rewritten, so re-fetches don't churn the FTS index
+            conn.executemany(
+                "INSERT INTO creatives (uid, platform, brand, title, body, cta, date, url) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (uid) DO UPDATE SET brand = COALESCE(excluded.brand, brand),"
+                " title = excluded.title, body = excluded.body, cta = excluded.cta, date = excluded.date, url = excluded.url"
+                " WHERE (COALESCE(excluded.brand, brand), excluded.title, excluded.body, excluded.cta, excluded.date,"
+                " excluded.url) IS NOT (brand, title, body, cta, date, url)",
+                rows,
+            )
+        return len(rows)
+
+    def add_response(self, endpoint, params, data):
+        return self.add(creatives_from_response(endpoint, params, data))
+
+    def search(self, text, platforms=None, limit=50):
+        """Best matches first, as dicts with a highlighted `snippet` of the matching text"""
+        query = match_query(text)
+        if query is None:
+            return []
+        sql = (
+            "SELECT c.platform, c.brand, c.title, c.cta, c.date, c.url,"
+            " snippet(creatives_fts, -1, '**', '**', ' … ', 16),"
+            f" bm25(creatives_fts, {', '.join(map(str, RANK_WEIGHTS))}) AS score"
+            " FROM creatives_fts JOIN creatives c ON c.id = creatives_fts.rowid"
+            " WHERE creatives_fts MATCH ?"
+        )
+        args = [query]
+        if platforms:
+            sql += f" AND c.platform IN ({', '.join('?' * len(platforms))})"
+            args += list(platforms)
+        sql += " ORDER BY score LIMIT ?"
+        args.append(limit)
+        columns = ["platform", "brand", "title", "cta", "date", "url", "snippet", "score"]
+        return [dict(zip(columns, row)) for row in self._connect().execute(sql, args)]
+
+    def stats(self):
+        rows = self._connect().execute("SELECT platform, COUNT(*) FROM creatives GROUP BY platform")
+        return dict(rows.fetchall())
+
+    def rebuild_from_cache(self, cache_path=CACHE_PATH):
+        """Index every response still held in the response cache; returns creatives indexed"""
+        # Cache keys are hashes, so request params (domain, handle) are gone; existing brands are kept
+        total = 0
+        cache = sqlite3.connect(cache_path)
+        try:
+            rows = cache.execute(
+                "SELECT endpoint, payload FROM entries WHERE endpoint IN (?, ?, ?, ?)",
+                (COMPANY_ADS, GOOGLE_ADS, INSTAGRAM_REELS, INSTAGRAM_REELS_PAGED),
+            )
+            for endpoint, payload in rows:
+                total += self.add_response(endpoint, {}, json.loads(zlib.decompress(payload)))
+        finally:
+            cache.close()
+        return total
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = CreativeIndex()
+    return _index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Creative full-text index")
+    parser.add_argument("--rebuild", action="store_true", help="Index every response in the response cache")
+    parser.add_argument("query", nargs="?", help="Search the index")
+    args = parser.parse_args(argv)
+
+    index = get_index()
+    if args.rebuild:
+        print(f"Indexed {index.rebuild_from_cache()} creatives", file=sys.stderr)
+    if args.query:
+        for result in index.search(args.query):
+            print(f"[{result['platform']}] {result['brand'] or '?'}: {result['snippet']}  {result['url'] or ''}")
+    print(json.dumps(index.stats()), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
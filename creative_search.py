@@ -0,0 +1,8 @@
+import streamlit as st
+
+from rate_limit import bind_streamlit_session
+from views import search
+
+st.set_page_config(page_title="Creative Search", page_icon="🔎", layout="wide")
+bind_streamlit_session()
+search.render()
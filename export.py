@@ -0,0 +1,256 @@
+"""Streaming export of ads, reels and PageSpeed runs to CSV, NDJSON or Parquet.
+
+    python export.py facebook 51212153078 --output nike.parquet
+    python export.py facebook 51212153078 --store --fields ad_archive_id,start_date,body_text
+    python export.py google nike.com adidas.com --format csv --output google.csv
+    python export.py instagram nike --limit 1000 --output reels.ndjson
+    python export.py pagespeed https://web.dev/ --format csv
+
+Records are pulled one upstream (or store) page at a time and written in
+CHUNK_ROWS batches, so memory stays bounded by a page and a chunk however
+many ads an advertiser has. Only the selected fields are kept from each record.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from functools import partial
+from itertools import islice
+
+from ad_tables import FACEBOOK_COLUMNS, GOOGLE_COLUMNS, REEL_COLUMNS, REEL_COUNT_COLUMNS, facebook_row, google_row, reel_row
+from fb_sync import get_sync_store
+from instagram_fetch import iter_reel_pages
+from pagespeed import CORE_WEB_VITALS, DIAGNOSTIC_KEYS, get_store
+from rate_limit import BULK, set_caller
+from scrapecreators import get_company_ads, get_google_ads
+
+# ========== CONFIG ==========
+CHUNK_ROWS = 5000  # rows per write; also the Parquet row group size
+STORE_PAGE_SIZE = 500
+DEFAULT_REEL_LIMIT = 100
+KINDS = ["facebook", "google", "instagram", "pagespeed"]
+FIELDS = {
+    "facebook": ["page_id"] + FACEBOOK_COLUMNS,
+    "google": ["domain"] + GOOGLE_COLUMNS,
+    "instagram": ["handle"] + REEL_COLUMNS,
+    "pagespeed": ["url", "strategy", "fetchTime", "performanceScore"]
+    + [key for _, key in CORE_WEB_VITALS] + DIAGNOSTIC_KEYS,
+}
+INT, FLOAT, BOOL = "int", "float", "bool"  # everything else is written as a string
+FIELD_TYPES = {
+    "is_active": BOOL,
+    "has_card": BOOL,
+    "impressions_lower": INT,
+    "impressions_upper": INT,
+    "taken_at": INT,
+    "media_type": INT,
+    **{column: INT for column in REEL_COUNT_COLUMNS},
+    "performanceScore": FLOAT,
+    **{key: FLOAT for _, key in CORE_WEB_VITALS},
+}
+
+
+# ========== SOURCES ==========
+def facebook_records(page_id, from_store=False):
+    """Every ad of a page, from the API (through the response cache) or the local sync store"""
+    if from_store:
+        fetch_page = partial(get_sync_store().fetch_page, page_size=STORE_PAGE_SIZE)
+    else:
+        fetch_page = get_company_ads
+    cursor = None
+    while True:
+        page = fetch_page(page_id, cursor) or {}
+        for ad in page.get("results") or []:
+            yield {"page_id": str(page_id), **facebook_row(ad)}
+        cursor = page.get("cursor")
+        if not cursor:
+            return
+
+
+def google_records(domain):
+    for ad in get_google_ads(domain):
+        yield {"domain": domain, **google_row(ad)}
+
+
+def instagram_records(handle, limit=DEFAULT_REEL_LIMIT):
+    for entries in iter_reel_pages(handle, limit):
+        for entry in entries:
+            if entry.get("media"):
+                yield {"handle": handle, **reel_row(entry["media"])}
+
+
+def pagespeed_records(url=None, strategy=None):
+    """Stored PageSpeed runs, oldest first, with each vital's numeric value and each diagnostic's display value"""
+    for result in get_store().runs(url, strategy):
+        row = {field: result.get(field) for field in FIELDS["pagespeed"][:4]}
+        for _, key in CORE_WEB_VITALS:
+            row[key] = (result["vitals"].get(key) or {}).get("numericValue")
+        for key in DIAGNOSTIC_KEYS:
+            row[key] = (result["diagnostics"].get(key) or {}).get("displayValue")
+        yield row
+
+
+# ========== PROJECTION ==========
+def _typed(value, kind):
+    if value is None or value == "":
+        return None
+    if kind == BOOL:
+        return bool(value)
+    if kind in (INT, FLOAT):
+        try:
+            return int(value) if kind == INT else float(value)
+        except (TypeError, ValueError):
+            return None
+    return value if isinstance(value, str) else str(value)
+
+
+def project(records, fields):
+    """Keep only fields from each record, typed the same way for every format"""
+    typed = [(field, FIELD_TYPES[field]) for field in fields if field in FIELD_TYPES]
+    strings = [field for field in fields if field not in FIELD_TYPES]
+    for record in records:
+        row = dict.fromkeys(fields)
+        for field in strings:
+            value = record.get(field)
+            # Almost every value is already a non-empty string or None; only the rest need converting
+            row[field] = value if value is None or (value.__class__ is str and value) else _typed(value, None)
+        for field, kind in typed:
+            row[field] = _typed(record.get(field), kind)
+        yield row
+
+
+def chunks(rows, size=CHUNK_ROWS):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# ========== WRITERS ==========
+def write_csv(rows, fields, out):
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+    writer = csv.DictWriter(text, fieldnames=fields)
+    writer.writeheader()
+    count = 0
+    for chunk in chunks(rows):
+        writer.writerows(chunk)
+        text.flush()
+        count += len(chunk)
+    text.detach()  # leave out open for the caller
+    return count
+
+
+def write_ndjson(rows, fields, out):
+    count = 0
+    for chunk in chunks(rows):
+        out.write("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in chunk).encode("utf-8"))
+        count += len(chunk)
+    return count
+
+
+def write_parquet(rows, fields, out):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arrow_types = {INT: pa.int64(), FLOAT: pa.float64(), BOOL: pa.bool_()}
+    schema = pa.schema([(field, arrow_types.get(FIELD_TYPES.get(field), pa.string())) for field in fields])
+    count = 0
+    with pq.ParquetWriter(out, schema) as writer:
+        for chunk in chunks(rows):
+            writer.write_table(pa.table({field: [row[field] for row in chunk] for field in fields}, schema=schema))
+            count += len(chunk)
+    return count
+
+
+def _parquet_available():
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+WRITERS = {"csv": write_csv, "ndjson": write_ndjson, "parquet": write_parquet}
+MIME_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson", "parquet": "application/vnd.apache.parquet"}
+FORMATS = [fmt for fmt in WRITERS if fmt != "parquet" or _parquet_available()]
+
+
+def select_fields(kind, fields=None):
+    """The fields to keep, in order (all of them by default); ValueError for an unknown field"""
+    fields = list(fields or FIELDS[kind])
+    unknown = [field for field in fields if field not in FIELDS[kind]]
+    if unknown:
+        raise ValueError(f"Unknown {kind} fields: {', '.join(unknown)}")
+    return fields
+
+
+def export(kind, records, out, fmt="csv", fields=None):
+    """Write records of kind to the binary file out; returns the number of rows written"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    fields = select_fields(kind, fields)
+    return WRITERS[fmt](project(records, fields), fields, out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export ads, reels or PageSpeed runs")
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("targets", nargs="*", help="Page IDs, domains or handles; for pagespeed, URLs (default: all)")
+    parser.add_argument("--targets-file", help="Read more targets from this file, one per line")
+    parser.add_argument("--format", choices=FORMATS, help="Defaults to the output file's extension, else csv")
+    parser.add_argument("--fields", help="Comma-separated fields to keep (default: all)")
+    parser.add_argument("--output", default="-", help="Output file, or - for stdout")
+    parser.add_argument("--store", action="store_true", help="facebook: read the local sync store instead of the API")
+    parser.add_argument("--limit", type=int, default=DEFAULT_REEL_LIMIT, help="instagram: reels per handle")
+    parser.add_argument("--strategy", help="pagespeed: only this strategy")
+    parser.add_argument("--list-fields", action="store_true", help="Print the available fields and exit")
+    args = parser.parse_args(argv)
+
+    if args.list_fields:
+        print("\n".join(FIELDS[args.kind]))
+        return 0
+    targets = list(args.targets)
+    if args.targets_file:
+        with open(args.targets_file, encoding="utf-8") as f:
+            targets += [line.split("#", 1)[0].strip() for line in f if line.split("#", 1)[0].strip()]
+    if not targets and args.kind != "pagespeed":
+        parser.error(f"{args.kind} needs at least one target")
+    extension = os.path.splitext(args.output)[1].lstrip(".")
+    fmt = args.format or (extension if extension in FORMATS else "csv")
+    try:
+        fields = select_fields(args.kind, [field.strip() for field in args.fields.split(",")] if args.fields else None)
+    except ValueError as e:
+        parser.error(str(e))
+
+    # Queue behind interactive dashboard users in the shared scheduler
+    set_caller("export", BULK)
+
+    def records():
+        if args.kind == "pagespeed":
+            for url in targets or [None]:
+                yield from pagespeed_records(url, args.strategy)
+            return
+        for target in targets:
+            if args.kind == "facebook":
+                yield from facebook_records(target, args.store)
+            elif args.kind == "instagram":
+                yield from instagram_records(target.lstrip("@"), args.limit)
+            else:
+                yield from google_records(target)
+
+    out = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    try:
+        count = export(args.kind, records(), out, fmt, fields)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    print(f"[ok] {count} {args.kind} rows as {fmt}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from response_cache import CACHE_DIR
+from scrapecreators import get_company_ads
+
+# ========== CONFIG ==========
+STORE_PATH = os.path.join(CACHE_DIR, "fb_ads.sqlite3")
+MAX_SYNC_PAGES = 200  # safety stop for a first full pull
+RECENT_PAGE_AGE = 120  # a page fetched this recently (e.g. by speculative prefetch) counts as fresh
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ads (
+    page_id TEXT NOT NULL,
+    ad_archive_id TEXT NOT NULL,
+    start_date TEXT,
+    is_active INTEGER NOT NULL,
+    impressions_lower TEXT,
+    impressions_upper TEXT,
+    payload BLOB NOT NULL,
+    first_seen REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (page_id, ad_archive_id)
+);
+CREATE INDEX IF NOT EXISTS ads_by_start ON ads (page_id, start_date DESC);
+CREATE TABLE IF NOT EXISTS syncs (
+    page_id TEXT PRIMARY KEY,
+    synced_at REAL NOT NULL,
+    backfill_cursor TEXT
+);
+"""
+
+
+def _impressions(ad):
+    impressions = ad.get("impressions") or {}
+    lower, upper = impressions.get("lower_bound"), impressions.get("upper_bound")
+    return (None if lower is None else str(lower)), (None if upper is None else str(upper))
+
+
+class AdSyncStore:
+    """Ads seen per page_id, keyed by ad_archive_id, kept current by incremental syncs"""
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        # Stores created before syncs could be resumed lack the column
+        if "backfill_cursor" not in {row[1] for row in conn.execute("PRAGMA table_info(syncs)")}:
+            conn.execute("ALTER TABLE syncs ADD COLUMN backfill_cursor TEXT")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def last_synced(self, page_id):
+        row = self._connect().execute("SELECT synced_at FROM syncs WHERE page_id = ?", (str(page_id),)).fetchone()
+        return row[0] if row else None
+
+    def _known(self, page_id):
+        rows = self._connect().execute(
+            "SELECT ad_archive_id, is_active, impressions_lower, impressions_upper FROM ads WHERE page_id = ?",
+            (str(page_id),),
+        )
+        return {ad_id: (bool(active), lower, upper) for ad_id, active, lower, upper in rows}
+
+    def _newest_start(self, page_id):
+        row = self._connect().execute("SELECT MAX(start_date) FROM ads WHERE page_id = ?", (str(page_id),)).fetchone()
+        return row[0]
+
+    def backfill_cursor(self, page_id):
+        """Where a first pull that did not finish resumes; None once the page's whole history is stored"""
+        row = self._connect().execute("SELECT backfill_cursor FROM syncs WHERE page_id = ?", (str(page_id),)).fetchone()
+        return row[0] if row else None
+
+    def sync(self, page_id, fetch_page=None):
+        """Pull new or changed ads for page_id, stopping once a page reaches already-known ads.
+
+        fetch_page(page_id, cursor) must bypass response caches; by default the
+        API is called with fresh=True, accepting only copies younger than
+        RECENT_PAGE_AGE. A pull cut short by a failed page or MAX_SYNC_PAGES
+        saves its cursor, and later syncs resume the rest of the history from
+        there after fetching the new head pages. Returns {"new", "updated",
+        "pages", "complete"}.
+        """
+        fetch_page = fetch_page or (
+            lambda pid, cursor: get_company_ads(pid, cursor, fresh=True, max_age=RECENT_PAGE_AGE)
+        )
+        page_id = str(page_id)
+        known = self._known(page_id)
+        backfill = self.backfill_cursor(page_id)
+        stats = {"new": 0, "updated": 0, "pages": 0}
+
+        resume, head_done = self._pull(page_id, None, fetch_page, known, self._newest_start(page_id), stats)
+        if not head_done:
+            # Everything below this cursor is unsynced; walking on from it also covers any older backfill
+            backfill = resume
+        elif backfill:
+            resume, done = self._pull(page_id, backfill, fetch_page, known, None, stats)
+            backfill = None if done else resume
+
+        self._connect().execute(
+            "INSERT OR REPLACE INTO syncs (page_id, synced_at, backfill_cursor) VALUES (?, ?, ?)",
+            (page_id, time.time(), backfill),
+        )
+        stats["complete"] = backfill is None
+        return stats
+
+    def _pull(self, page_id, cursor, fetch_page, known, newest, stats):
+        """Store pages from cursor on; returns (cursor to resume from, whether the walk finished).
+
+        With newest set (a head pull) the walk finishes at the first page that
+        overlaps known ads; without it (a backfill) only at the end of the history.
+        """
+        conn = self._connect()
+        while stats["pages"] < MAX_SYNC_PAGES:
+            data = fetch_page(page_id, cursor)
+            if not data or "results" not in data:
+                if stats["pages"] == 0 and cursor is None:
+                    raise ValueError(f"Could not fetch ads for page {page_id}")
+                return cursor, False
+            results = data["results"]
+            stats["pages"] += 1
+            now = time.time()
+            reached_known = False
+
+            with conn:  # one transaction per page; rolled back if anything fails
+                conn.execute("BEGIN")
+                for ad in results:
+                    ad_id = str(ad.get("ad_archive_id"))
+                    lower, upper = _impressions(ad)
+                    state = (bool(ad.get("is_active")), lower, upper)
+                    payload = zlib.compress(json.dumps(ad, separators=(",", ":")).encode("utf-8"))
+                    if ad_id not in known:
+                        conn.execute(
+                            "INSERT INTO ads (page_id, ad_archive_id, start_date, is_active, impressions_lower, impressions_upper,"
+                            " payload, first_seen, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            (page_id, ad_id, ad.get("start_date_string"), int(state[0]), lower, upper, payload, now, now),
+                        )
+                        known[ad_id] = state
+                        stats["new"] += 1
+                        continue
+                    reached_known = True
+                    if known[ad_id] != state:
+                        conn.execute(
+                            "UPDATE ads SET is_active = ?, impressions_lower = ?, impressions_upper = ?, payload = ?, updated_at = ?"
+                            " WHERE page_id = ? AND ad_archive_id = ?",
+                            (int(state[0]), lower, upper, payload, now, page_id, ad_id),
+                        )
+                        known[ad_id] = state
+                        stats["updated"] += 1
+
+            # Results come newest first, so once a page overlaps what we already hold
+            # (or is older than our newest ad) the rest of the history is known too
+            oldest_on_page = min((ad.get("start_date_string") or "" for ad in results), default="")
+            if newest is not None and (reached_known or (oldest_on_page and oldest_on_page < newest)):
+                return None, True
+            cursor = data.get("cursor")
+            if not cursor or not results:
+                return None, True
+        return cursor, False
+
+    def count(self, page_id):
+        return self._connect().execute("SELECT COUNT(*) FROM ads WHERE page_id = ?", (str(page_id),)).fetchone()[0]
+
+    def fetch_page(self, page_id, cursor=None, page_size=50):
+        """Serve stored ads in the API's page/cursor shape, newest first, so AdPager can read them"""
+        offset = int(cursor or 0)
+        rows = self._connect().execute(
+            "SELECT payload FROM ads WHERE page_id = ? ORDER BY start_date DESC, ad_archive_id LIMIT ? OFFSET ?",
+            (str(page_id), page_size + 1, offset),
+        ).fetchall()
+        results = [json.loads(zlib.decompress(payload)) for (payload,) in rows[:page_size]]
+        next_cursor = str(offset + page_size) if len(rows) > page_size else None
+        return {"results": results, "cursor": next_cursor}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_sync_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = AdSyncStore()
+    return _store
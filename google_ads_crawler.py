@@ -0,0 +1,194 @@
+"""Headless bulk crawler for Google Ads by domain.
+
+    python google_ads_crawler.py domains.txt --output ads.jsonl
+    python google_ads_crawler.py domains.txt --output ads_parquet/ --format parquet
+
+Completed domains are appended to a checkpoint file once their rows are on
+disk, so re-running the same command resumes where it stopped.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+from rate_limit import BULK, TokenBucket, set_caller
+from scrapecreators import get_google_ads
+
+AD_FIELDS = ["creativeId", "advertiserId", "format", "firstShown", "lastShown", "adUrl"]
+PARQUET_BATCH_ROWS = 5000
+
+
+def read_domains(path):
+    domains = []
+    seen = set()
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            domain = line.split("#", 1)[0].strip().lower()
+            if domain and domain not in seen:
+                seen.add(domain)
+                domains.append(domain)
+    return domains
+
+
+def read_checkpoint(path):
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def normalize_ad(domain, ad, fetched_at):
+    row = {field: ad.get(field) for field in AD_FIELDS}
+    row["domain"] = domain
+    row["fetchedAt"] = fetched_at
+    return row
+
+
+class JsonlWriter:
+    def __init__(self, path):
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, domain, rows):
+        """Append a domain's rows; returns the domains whose rows are now on disk"""
+        for row in rows:
+            self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self._file.flush()
+        return [domain]
+
+    def flush(self):
+        return []
+
+    def close(self):
+        self._file.close()
+        return []
+
+
+class ParquetWriter:
+    """Buffers rows and writes each batch as its own complete part file in a directory.
+
+    A part is renamed into place only once its footer is written, so a crash
+    never leaves an unreadable file, and resumed runs never rewrite old parts.
+    """
+
+    def __init__(self, directory):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._pq = pq
+        self._schema = pa.schema([(field, pa.string()) for field in AD_FIELDS + ["domain", "fetchedAt"]])
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        # Unique per run, so a quick resume cannot overwrite the parts of the run before it
+        self._run = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        self._parts = 0
+        self._pending = []
+        self._pending_domains = []
+
+    def write(self, domain, rows):
+        """Buffer a domain's rows; returns the domains whose rows are now on disk"""
+        self._pending.extend(rows)
+        self._pending_domains.append(domain)
+        if len(self._pending) >= PARQUET_BATCH_ROWS:
+            return self.flush()
+        return []
+
+    def flush(self):
+        """Write buffered rows as a new part; returns the domains they belong to"""
+        if self._pending:
+            columns = {name: [None if row[name] is None else str(row[name]) for row in self._pending] for name in self._schema.names}
+            path = os.path.join(self._directory, f"part-{self._run}-{self._parts:05d}.parquet")
+            # Dot-prefixed, so readers of the directory skip a part that is still being written
+            tmp_path = os.path.join(self._directory, f".{os.path.basename(path)}.tmp")
+            self._pq.write_table(self._pa.table(columns, schema=self._schema), tmp_path)
+            os.replace(tmp_path, path)
+            self._parts += 1
+        domains = self._pending_domains
+        self._pending = []
+        self._pending_domains = []
+        return domains
+
+    def close(self):
+        return self.flush()
+
+
+def crawl(domains, writer, checkpoint_path, concurrency=8, rate=2.0):
+    """Fetch every domain under a shared rate limit, writing rows as each domain completes"""
+    bucket = TokenBucket(rate)
+
+    def fetch(domain):
+        # Queue behind interactive dashboard users in the shared scheduler
+        set_caller("google-ads-crawler", BULK)
+        bucket.acquire()
+        return get_google_ads(domain, fresh=True)
+
+    stats = {"domains": 0, "ads": 0, "failed": 0}
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        with open(checkpoint_path, "a", encoding="utf-8") as checkpoint:
+
+            def mark_done(done):
+                # Only called with domains whose rows the writer has put on disk
+                for domain in done:
+                    checkpoint.write(domain + "\n")
+                checkpoint.flush()
+
+            try:
+                futures = {executor.submit(fetch, domain): domain for domain in domains}
+                for future in as_completed(futures):
+                    domain = futures[future]
+                    try:
+                        ads = future.result()
+                    except Exception as e:
+                        stats["failed"] += 1
+                        print(f"[error] {domain}: {e}", file=sys.stderr)
+                        continue
+                    fetched_at = datetime.now(timezone.utc).isoformat()
+                    mark_done(writer.write(domain, [normalize_ad(domain, ad, fetched_at) for ad in ads]))
+                    stats["domains"] += 1
+                    stats["ads"] += len(ads)
+                    print(f"[ok] {domain}: {len(ads)} ads", file=sys.stderr)
+            finally:
+                # Also on Ctrl-C: write what completed domains still have buffered, then mark them done
+                mark_done(writer.flush())
+    finally:
+        # On Ctrl-C, drop queued domains instead of fetching them all before exiting
+        executor.shutdown(wait=True, cancel_futures=True)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-fetch Google Ads for a list of domains")
+    parser.add_argument("domains_file", help="Text file with one domain per line (# comments allowed)")
+    parser.add_argument("--output", required=True, help="JSONL file, or a directory for parquet parts")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    parser.add_argument("--checkpoint", help="Completed-domain log (default: <output>.checkpoint)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=2.0, help="Max API requests per second across all workers")
+    args = parser.parse_args(argv)
+
+    checkpoint_path = args.checkpoint or args.output.rstrip("/\\") + ".checkpoint"
+    done = read_checkpoint(checkpoint_path)
+    domains = [domain for domain in read_domains(args.domains_file) if domain not in done]
+    print(f"{len(done)} domains already done, {len(domains)} to fetch", file=sys.stderr)
+
+    writer = ParquetWriter(args.output) if args.format == "parquet" else JsonlWriter(args.output)
+    started = time.monotonic()
+    try:
+        stats = crawl(domains, writer, checkpoint_path, args.concurrency, args.rate)
+    finally:
+        writer.close()
+    print(
+        f"Fetched {stats['ads']} ads from {stats['domains']} domains "
+        f"({stats['failed']} failed) in {time.monotonic() - started:.1f}s",
+        file=sys.stderr,
+    )
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from rate_limit import bind_caller
+from scrapecreators import get_instagram_reels, get_instagram_reels_page
+
+# ========== CONFIG ==========
+MAX_WORKERS = 8
+# The simple endpoint returns everything in one response; above this we page instead
+SIMPLE_REELS_MAX = 12
+DEFAULT_REEL_COUNT = 10
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="instagram")
+
+
+def submit(fn, *args):
+    # Run as the submitting session so the rate limiter and credit ledger attribute the call
+    return _executor.submit(bind_caller(fn), *args)
+
+
+def _as_reel_entries(items):
+    # The paged endpoint returns bare media objects; the simple one wraps them as {"media": ...}
+    return [item if "media" in item else {"media": item} for item in items]
+
+
+def _single_page(future):
+    reels = future.result()
+    if not isinstance(reels, list):
+        raise ValueError((reels or {}).get("error") or "Failed to load reels")
+    yield reels
+
+
+def _paged(handle, amount, future):
+    fetched = 0
+    while future is not None:
+        page = future.result()
+        items = page.get("items") or []
+        paging = page.get("paging_info") or {}
+        max_id = paging.get("max_id") if paging.get("more_available") else None
+        remaining = amount - fetched
+        fetched += len(items)
+        # Ask for the next page before handing this one back, so it downloads while the caller renders
+        future = submit(get_instagram_reels_page, handle, max_id) if max_id and items and fetched < amount else None
+        yield _as_reel_entries(items[:remaining])
+
+
+def iter_reel_pages(handle, amount):
+    """Yield lists of reel entries totalling at most amount.
+
+    The first request is sent immediately (alongside whatever else the caller
+    has in flight); each later page is requested as soon as the previous one
+    arrives. Pages are cursor-linked, so they cannot be requested all at once.
+    """
+    if amount <= SIMPLE_REELS_MAX:
+        return _single_page(submit(get_instagram_reels, handle, amount))
+    return _paged(handle, amount, submit(get_instagram_reels_page, handle, None))
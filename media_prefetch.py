@@ -0,0 +1,82 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from api_client import CONNECT_TIMEOUT, get_external_session
+
+# ========== CONFIG ==========
+MAX_WORKERS = 8
+DOWNLOAD_DEADLINE = 15  # seconds for a whole download, not just between bytes
+MAX_MEDIA_BYTES = 25 * 1024 * 1024
+MAX_TRACKED = 512
+CHUNK_SIZE = 64 * 1024
+
+
+def download_media(url, deadline=DOWNLOAD_DEADLINE):
+    """Download a media URL within a wall-clock deadline; returns None on a non-200 response"""
+    started = time.monotonic()
+    with get_external_session().get(url, stream=True, timeout=(CONNECT_TIMEOUT, deadline)) as response:
+        if response.status_code != 200:
+            return None
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(CHUNK_SIZE):
+            if time.monotonic() - started > deadline:
+                raise TimeoutError(f"Download exceeded {deadline}s")
+            size += len(chunk)
+            if size > MAX_MEDIA_BYTES:
+                raise ValueError(f"Media larger than {MAX_MEDIA_BYTES} bytes")
+            chunks.append(chunk)
+    return b"".join(chunks)
+
+
+class MediaPrefetcher:
+    """Starts media downloads on a bounded thread pool and hands back the results by URL.
+
+    Call prefetch() as soon as the URLs are known, then get() from the render
+    loop; get() only waits for downloads that have not finished yet.
+    """
+
+    def __init__(self, loader=download_media, max_workers=MAX_WORKERS, deadline=DOWNLOAD_DEADLINE, max_tracked=MAX_TRACKED):
+        self.loader = loader
+        self.deadline = deadline
+        self.max_tracked = max_tracked
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="media-prefetch")
+        self._futures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _submit(self, url):
+        with self._lock:
+            future = self._futures.get(url)
+            if future is not None and not (future.done() and future.exception() is not None):
+                self._futures.move_to_end(url)
+                return future
+            future = self._executor.submit(self.loader, url)
+            self._futures[url] = future
+            self._trim()
+            return future
+
+    def _trim(self):
+        # Forget the oldest finished downloads; pending ones stay so callers can still collect them
+        excess = len(self._futures) - self.max_tracked
+        for url in list(self._futures):
+            if excess <= 0:
+                break
+            if self._futures[url].done():
+                del self._futures[url]
+                excess -= 1
+
+    def prefetch(self, urls):
+        for url in urls:
+            if url:
+                self._submit(url)
+
+    def get(self, url):
+        """Return the downloaded result for url, waiting at most the deadline"""
+        try:
+            return self._submit(url).result(timeout=self.deadline)
+        except FutureTimeoutError:
+            raise TimeoutError(f"Timed out after {self.deadline}s") from None
+
@@ -0,0 +1,364 @@
+"""Local caching proxy for ad videos, with HTTP range requests and poster frames.
+
+    python media_proxy.py --port 8599    # standalone; dashboards then need MEDIA_PROXY_URL=http://<host>:8599
+    MEDIA_PROXY_PORT=8599 streamlit run main.py   # or serve it in-process on 127.0.0.1
+
+The proxy is off by default, and browsers get CDN links directly. When it is
+enabled, each video is downloaded from the CDN once, in the background on its
+first request, and kept in a byte-capped LRU directory. Until that copy is
+complete the browser is redirected to the CDN, so playback never waits for the
+download; afterwards it seeks within the local copy using Range requests.
+Dashboards register a CDN URL under a stable key (the ad's ID), so an expired
+CDN link does not matter once the video is cached. Posters come from the ad's
+preview image, or from ffmpeg when it is installed.
+"""
+import argparse
+import io
+import os
+import re
+import shutil
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from PIL import Image
+
+from api_client import CONNECT_TIMEOUT, get_external_session
+from media_prefetch import CHUNK_SIZE, download_media
+from metrics import timer
+from response_cache import CACHE_DIR
+from singleflight import SingleFlight
+from thumbnails import ThumbnailStore, url_digest
+
+# ========== CONFIG ==========
+MEDIA_DIR = os.path.join(CACHE_DIR, "media")
+REGISTRY_PATH = os.path.join(CACHE_DIR, "media.sqlite3")
+MAX_MEDIA_CACHE_BYTES = int(os.environ.get("ADS_MEDIA_MAX_BYTES", 2 * 1024 * 1024 * 1024))
+MAX_VIDEO_BYTES = 300 * 1024 * 1024
+DOWNLOAD_DEADLINE = 120
+DOWNLOAD_WORKERS = 4
+PROXY_PORT = int(os.environ.get("MEDIA_PROXY_PORT", 0))  # serve in-process on this port; 0 = don't
+PROXY_HOST = os.environ.get("MEDIA_PROXY_HOST", "127.0.0.1")
+# Where browsers reach the proxy; empty (the default without a port) hands CDN links to the browser directly.
+# Set it when the dashboard is not viewed from the proxy's host, e.g. to an HTTPS reverse proxy in front of it.
+PROXY_URL = os.environ.get("MEDIA_PROXY_URL", f"http://localhost:{PROXY_PORT}" if PROXY_PORT else "").rstrip("/")
+POSTER_EDGE = 800
+POSTER_AT = 1.0  # seconds into the video for ffmpeg posters
+FFMPEG = shutil.which("ffmpeg")
+
+_RANGE = re.compile(r"bytes=(\d*)-(\d*)$")
+_executor = ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS, thread_name_prefix="media-download")
+
+
+class MediaRegistry:
+    """Stable key -> latest CDN URL (and preview image), shared by every process on the host"""
+
+    def __init__(self, path=REGISTRY_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS media (key TEXT PRIMARY KEY, url TEXT NOT NULL, poster_url TEXT,"
+            " content_type TEXT, registered_at REAL NOT NULL)"
+        )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def register(self, url, stable_id=None, poster_url=None):
+        """Key under which the proxy serves url; re-registering refreshes an expired link"""
+        key = url_digest(stable_id or url)[:40]
+        self._connect().execute(
+            "INSERT INTO media (key, url, poster_url, registered_at) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT (key) DO UPDATE SET url = excluded.url,"
+            " poster_url = COALESCE(excluded.poster_url, poster_url), registered_at = excluded.registered_at",
+            (key, url, poster_url, time.time()),
+        )
+        return key
+
+    def lookup(self, key):
+        """(url, poster_url, content_type) for key, or None"""
+        return self._connect().execute(
+            "SELECT url, poster_url, content_type FROM media WHERE key = ?", (key,)
+        ).fetchone()
+
+    def set_content_type(self, key, content_type):
+        self._connect().execute("UPDATE media SET content_type = ? WHERE key = ?", (content_type, key))
+
+
+class MediaProxy:
+    """Fetches each registered video once into the media store and cuts poster frames from it"""
+
+    def __init__(self, registry=None, store=None):
+        self.registry = registry or MediaRegistry()
+        self.store = store or ThumbnailStore(MEDIA_DIR, MAX_MEDIA_CACHE_BYTES)
+        self._flight = SingleFlight()
+
+    def media_path(self, key):
+        return os.path.join(self.store.root, key[:2], f"{key}.media")
+
+    def poster_path(self, key):
+        return os.path.join(self.store.root, key[:2], f"{key}-poster.jpg")
+
+    def cached(self, key):
+        """Local path of the video for key if it is fully downloaded, else None"""
+        path = self.media_path(key)
+        return path if self.store.touch(path) else None
+
+    def fetch(self, key):
+        """Local path of the video for key, downloading it first if needed; None if unknown or unavailable"""
+        path = self.cached(key)
+        if path:
+            return path
+        # Concurrent viewers (and the poster job) share one download
+        path = self.media_path(key)
+        return self._flight.do(key, lambda: self._download(key, path), group="media")
+
+    def fetch_in_background(self, key):
+        _executor.submit(self._fetch_quietly, key)
+
+    def _fetch_quietly(self, key):
+        try:
+            self.fetch(key)
+        except Exception:
+            pass  # the viewer is already playing from the CDN; the next request tries again
+
+    def _download(self, key, path):
+        if os.path.exists(path):
+            return path
+        entry = self.registry.lookup(key)
+        if entry is None:
+            return None
+        url = entry[0]
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        started = time.monotonic()
+        size = 0
+        try:
+            with timer("media_download_seconds"), get_external_session().get(
+                url, stream=True, timeout=(CONNECT_TIMEOUT, DOWNLOAD_DEADLINE)
+            ) as response:
+                if response.status_code != 200:
+                    return None
+                self.registry.set_content_type(key, response.headers.get("Content-Type") or "video/mp4")
+                with open(tmp_path, "wb") as f:
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        if time.monotonic() - started > DOWNLOAD_DEADLINE:
+                            raise TimeoutError(f"Download exceeded {DOWNLOAD_DEADLINE}s")
+                        size += len(chunk)
+                        if size > MAX_VIDEO_BYTES:
+                            raise ValueError(f"Media larger than {MAX_VIDEO_BYTES} bytes")
+                        f.write(chunk)
+            self.store.commit(tmp_path, path, size)
+            return path
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def poster(self, key):
+        """Local path of a JPEG poster for key, or None if none can be made"""
+        path = self.poster_path(key)
+        if self.store.touch(path):
+            return path
+        return self._flight.do(f"{key}-poster", lambda: self._make_poster(key, path), group="poster")
+
+    def _make_poster(self, key, path):
+        if os.path.exists(path):
+            return path
+        entry = self.registry.lookup(key)
+        if entry is None:
+            return None
+        image = None
+        if entry[1]:
+            data = download_media(entry[1])
+            if data:
+                image = Image.open(io.BytesIO(data))
+        if image is None and FFMPEG:
+            # Never hold a poster request for a whole download; cut the frame once the video is cached
+            video = self.cached(key)
+            if video is None:
+                self.fetch_in_background(key)
+                return None
+            frame = subprocess.run(
+                [FFMPEG, "-v", "error", "-ss", str(POSTER_AT), "-i", video, "-frames:v", "1", "-f", "image2pipe",
+                 "-vcodec", "mjpeg", "-"],
+                capture_output=True, timeout=30,
+            ).stdout
+            if frame:
+                image = Image.open(io.BytesIO(frame))
+        if image is None:
+            return None
+        image.thumbnail((POSTER_EDGE, POSTER_EDGE))
+        buffer = io.BytesIO()
+        image.convert("RGB").save(buffer, "JPEG", quality=80)
+        self.store.write(path, buffer.getvalue())
+        return path
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single-range Range header; None for the whole file; ValueError if unsatisfiable"""
+    match = _RANGE.match((header or "").strip())
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if not first:  # suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("range not satisfiable")
+    return start, end
+
+
+def _handler(proxy):
+    class MediaHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_HEAD(self):
+            self._serve(head=True)
+
+        def do_GET(self):
+            self._serve(head=False)
+
+        def _serve(self, head):
+            match = re.fullmatch(r"/(media|poster)/([0-9a-f]{40})", self.path.split("?", 1)[0])
+            if not match:
+                self.send_error(404)
+                return
+            kind, key = match.groups()
+            entry = proxy.registry.lookup(key)
+            if entry is None:
+                self.send_error(404)
+                return
+            if kind == "media":
+                path = proxy.cached(key)
+                if path is None:
+                    # Play from the CDN (which serves ranges itself) while the local copy downloads
+                    proxy.fetch_in_background(key)
+                    self.send_response(302)
+                    self.send_header("Location", entry[0])
+                    self.send_header("Cache-Control", "no-store")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+            else:
+                try:
+                    path = proxy.poster(key)
+                except Exception as e:
+                    self.send_error(502, str(e))
+                    return
+                if path is None:
+                    self.send_error(404)
+                    return
+            content_type = "image/jpeg" if kind == "poster" else (entry and entry[2]) or "video/mp4"
+            try:
+                f = open(path, "rb")
+            except FileNotFoundError:  # evicted between fetch and open
+                self.send_error(503)
+                return
+            with f:
+                size = os.fstat(f.fileno()).st_size
+                try:
+                    byte_range = parse_range(self.headers.get("Range"), size)
+                except ValueError:
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{size}")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                start, end = byte_range or (0, size - 1)
+                self.send_response(206 if byte_range else 200)
+                if byte_range:
+                    self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(end - start + 1))
+                self.send_header("Accept-Ranges", "bytes")
+                self.send_header("Cache-Control", "private, max-age=86400")
+                self.end_headers()
+                if head:
+                    return
+                f.seek(start)
+                remaining = end - start + 1
+                try:
+                    while remaining > 0:
+                        chunk = f.read(min(CHUNK_SIZE, remaining))
+                        if not chunk:
+                            break
+                        self.wfile.write(chunk)
+                        remaining -= len(chunk)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # the player seeks by dropping the connection and asking for a new range
+
+        def log_message(self, *args):
+            pass
+
+    return MediaHandler
+
+
+def start_http_server(proxy, port, host=PROXY_HOST):
+    """Serve /media/<key> (with Range support) and /poster/<key> from a daemon thread"""
+    server = ThreadingHTTPServer((host, port), _handler(proxy))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="media-proxy", daemon=True).start()
+    return server
+
+
+_proxy = None
+_proxy_lock = threading.Lock()
+
+
+def get_media_proxy():
+    """The process's MediaProxy, serving on PROXY_PORT unless another process on the host already is"""
+    global _proxy
+    if _proxy is None:
+        with _proxy_lock:
+            if _proxy is None:
+                proxy = MediaProxy()
+                if PROXY_PORT:
+                    try:
+                        start_http_server(proxy, PROXY_PORT)
+                    except OSError:
+                        pass  # another process on this host already serves the port; it shares our registry
+                _proxy = proxy
+    return _proxy
+
+
+def video_urls(url, stable_id=None, preview_url=None):
+    """(video URL, poster URL or None) to give the browser for a CDN video"""
+    if not PROXY_URL:
+        return url, preview_url
+    key = get_media_proxy().registry.register(url, stable_id, preview_url)
+    poster = f"{PROXY_URL}/poster/{key}" if preview_url or FFMPEG else None
+    return f"{PROXY_URL}/media/{key}", poster
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Caching media proxy for ad videos")
+    parser.add_argument("--host", default=PROXY_HOST, help="Interface to bind (default: loopback only)")
+    parser.add_argument("--port", type=int, default=PROXY_PORT or 8599)
+    args = parser.parse_args(argv)
+    server = ThreadingHTTPServer((args.host, args.port), _handler(MediaProxy()))
+    server.daemon_threads = True
+    print(f"Serving media on {args.host}:{args.port} from {MEDIA_DIR}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
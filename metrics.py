@@ -0,0 +1,214 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict, deque
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ========== CONFIG ==========
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 0))  # 0 = no HTTP endpoint
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")  # the endpoint names sessions and callers; keep it local
+BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf")]
+SESSION_SAMPLES = 500  # recent timings kept per session and series, for percentiles
+MAX_SESSIONS = 256
+
+
+def _series(name, labels):
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+def _session():
+    # Imported lazily: rate_limit depends on modules that record metrics
+    from rate_limit import current_caller
+
+    return current_caller()[0]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+class Metrics:
+    """Process-wide latency histograms and counters, plus recent timings per session.
+
+    Histograms use fixed Prometheus-style buckets so they cost the same however
+    many samples arrive; the per-session deques feed the p50/p95 panel.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = defaultdict(int)
+        self._sessions = OrderedDict()
+
+    def observe(self, name, seconds, **labels):
+        series = _series(name, labels)
+        session = _session()
+        with self._lock:
+            histogram = self._histograms.get(series)
+            if histogram is None:
+                histogram = self._histograms[series] = {"buckets": [0] * len(BUCKETS), "sum": 0.0, "count": 0}
+            histogram["buckets"][bisect_left(BUCKETS, seconds)] += 1
+            histogram["sum"] += seconds
+            histogram["count"] += 1
+
+            samples = self._sessions.get(session)
+            if samples is None:
+                samples = self._sessions[session] = {}
+                while len(self._sessions) > MAX_SESSIONS:
+                    self._sessions.popitem(last=False)
+            self._sessions.move_to_end(session)
+            samples.setdefault(series, deque(maxlen=SESSION_SAMPLES)).append(seconds)
+
+    def inc(self, name, amount=1, **labels):
+        with self._lock:
+            self._counters[_series(name, labels)] += amount
+
+    def counters(self, name):
+        """{labels dict as tuple: value} for one counter"""
+        with self._lock:
+            return {labels: value for (series, labels), value in self._counters.items() if series == name}
+
+    def session_summary(self, session=None):
+        """Rows of count/p50/p95 (ms) for every timer the session has recorded"""
+        session = session if session is not None else _session()
+        with self._lock:
+            samples = {series: sorted(values) for series, values in self._sessions.get(session, {}).items()}
+        rows = []
+        for (name, labels), values in sorted(samples.items()):
+            rows.append({
+                "metric": name,
+                "labels": ", ".join(f"{key}={value}" for key, value in labels),
+                "count": len(values),
+                "p50_ms": round(percentile(values, 0.50) * 1000, 1),
+                "p95_ms": round(percentile(values, 0.95) * 1000, 1),
+            })
+        return rows
+
+    def snapshot(self):
+        with self._lock:
+            histograms = [
+                {"name": name, "labels": dict(labels), "buckets": dict(zip(map(str, BUCKETS), histogram["buckets"])),
+                 "sum": histogram["sum"], "count": histogram["count"]}
+                for (name, labels), histogram in sorted(self._histograms.items())
+            ]
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+        return {"pid": os.getpid(), "time": time.time(), "histograms": histograms, "counters": counters}
+
+    def prometheus_text(self):
+        lines = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+        typed = set()
+        for (name, labels), histogram in histograms:
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            cumulative = 0
+            for bound, count in zip(BUCKETS, histogram["buckets"]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', le)])} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram['sum']}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram['count']}")
+        for (name, labels), value in counters:
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+
+def _handler(metrics):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, content_type = metrics.prometheus_text().encode(), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.json":
+                body, content_type = json.dumps(metrics.snapshot()).encode(), "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return MetricsHandler
+
+
+def start_http_server(metrics, port, host=METRICS_HOST):
+    """Serve /metrics (Prometheus text) and /metrics.json from a daemon thread"""
+    server = ThreadingHTTPServer((host, port), _handler(metrics))
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                metrics = Metrics()
+                if METRICS_PORT:
+                    try:
+                        start_http_server(metrics, METRICS_PORT)
+                    except OSError:
+                        pass  # another process on this host already serves the port
+                _metrics = metrics
+    return _metrics
+
+
+@contextmanager
+def timer(name, **labels):
+    """Record the duration of the with-block in the `name` histogram"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        get_metrics().observe(name, time.perf_counter() - started, **labels)
+
+
+def timed(name, **labels):
+    """Decorator form of timer()"""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timer(name, **labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name, amount=1, **labels):
+    get_metrics().inc(name, amount, **labels)
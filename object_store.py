@@ -0,0 +1,150 @@
+"""Process-wide, size-capped store for the records dashboards render, shared by every session.
+
+Sessions keep only keys (a page ID, a search query) and view state; the
+records behind a key live here once, however many analysts have it open.
+Least recently used entries are evicted past MAX_OBJECT_BYTES, and an
+evicted entry is simply rebuilt from the response cache or local stores
+the next time a session asks for it.
+"""
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from singleflight import SingleFlight
+
+# ========== CONFIG ==========
+MAX_OBJECT_BYTES = int(os.environ.get("ADS_OBJECT_STORE_MAX_BYTES", 512 * 1024 * 1024))
+
+
+def estimate_bytes(value):
+    """Approximate memory held by value: exact for DataFrames, a recursive sizeof for plain containers"""
+    if hasattr(value, "memory_bytes"):
+        return value.memory_bytes()
+    if hasattr(value, "memory_usage"):  # pandas DataFrame
+        return int(value.memory_usage(deep=True).sum())
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_bytes(key) + estimate_bytes(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_bytes(item) for item in value)
+    return size
+
+
+def kind_of(key):
+    return key.split(":", 1)[0]
+
+
+class ObjectStore:
+    """LRU of key -> shared value, capped by estimated bytes, with optional per-entry expiry"""
+
+    def __init__(self, max_bytes=MAX_OBJECT_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> [value, size, expires_at]
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._counts = defaultdict(int)
+
+    def get(self, key):
+        """The value under key, or None if absent or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is not None and entry[2] <= time.time():
+                self._drop(key)
+                entry = None
+            self._counts["hits" if entry is not None else "misses"] += 1
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value, ttl=None):
+        """Store value under key (replacing any previous one) and return it"""
+        size = estimate_bytes(value)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = [value, size, time.time() + ttl if ttl else None]
+            self._bytes += size
+            self._evict(keep=key)
+        return value
+
+    def get_or_create(self, key, factory, ttl=None):
+        """The value under key, building it with factory() once if absent; a None result is not stored"""
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        def create():
+            # Another session may have finished building it while we waited for the lock
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None:
+                return entry[0]
+            value = factory()
+            return self.put(key, value, ttl) if value is not None else None
+
+        return self._flight.do(key, create, group="object_store")
+
+    def resize(self, key):
+        """Re-measure an entry after its value grew in place, evicting others if the store is now over its cap"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return
+        size = estimate_bytes(entry[0])
+        with self._lock:
+            if self._entries.get(key) is entry:
+                self._bytes += size - entry[1]
+                entry[1] = size
+                self._evict(keep=key)
+
+    def discard(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+
+    def _drop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _evict(self, keep):
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            oldest = next(iter(self._entries))
+            if oldest == keep:
+                self._entries.move_to_end(keep)
+                oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self._counts["evictions"] += 1
+
+    def stats(self):
+        """Totals plus entries and bytes per kind (the key prefix before the first colon)"""
+        with self._lock:
+            kinds = defaultdict(lambda: {"entries": 0, "bytes": 0})
+            for key, (_, size, _) in self._entries.items():
+                kinds[kind_of(key)]["entries"] += 1
+                kinds[kind_of(key)]["bytes"] += size
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._counts["hits"],
+                "misses": self._counts["misses"],
+                "evictions": self._counts["evictions"],
+                "kinds": {kind: dict(counts) for kind, counts in sorted(kinds.items())},
+            }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_object_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ObjectStore()
+    return _store
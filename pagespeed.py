@@ -0,0 +1,157 @@
+import json
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from api_client import CONNECT_TIMEOUT, get_external_session
+from response_cache import CACHE_DIR
+
+# ========== CONFIG ==========
+API_KEY = os.environ.get("PAGESPEED_API_KEY", "")  # Replace with your own API key if needed
+PAGESPEED_URL = os.environ.get("PAGESPEED_URL", "https://www.googleapis.com/pagespeedonline/v5/runPagespeed")
+READ_TIMEOUT = 120  # Lighthouse runs routinely take 10-30s
+STORE_PATH = os.path.join(CACHE_DIR, "pagespeed.sqlite3")
+STRATEGIES = ["mobile", "desktop"]
+
+CORE_WEB_VITALS = [
+    ("Speed Index", "speed-index"),
+    ("First Contentful Paint", "first-contentful-paint"),
+    ("Largest Contentful Paint", "largest-contentful-paint"),
+    ("Time to Interactive", "interactive"),
+    ("Total Blocking Time", "total-blocking-time"),
+    ("Cumulative Layout Shift", "cumulative-layout-shift"),
+]
+
+DIAGNOSTIC_KEYS = [
+    "uses-long-cache-ttl", "uses-optimized-images", "dom-size",
+    "render-blocking-resources", "bootup-time", "main-thread-tasks",
+    "unminified-css", "unminified-javascript", "uses-text-compression",
+    "uses-responsive-images", "uses-webp-images"
+]
+
+
+def run_pagespeed(url, strategy):
+    params = {"url": url, "strategy": strategy, "key": API_KEY}
+    response = get_external_session().get(PAGESPEED_URL, params=params, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+    data = response.json()
+    if "error" in data:
+        raise ValueError(data["error"].get("message", "PageSpeed request failed"))
+    if not data.get("lighthouseResult", {}).get("fetchTime"):
+        raise ValueError("PageSpeed response had no Lighthouse result")
+    return data
+
+
+def extract_result(url, strategy, data):
+    """Keep only the score and audits the app displays"""
+    lighthouse = data.get("lighthouseResult", {})
+    audits = lighthouse.get("audits", {})
+    vitals = {}
+    for _, key in CORE_WEB_VITALS:
+        audit = audits.get(key, {})
+        vitals[key] = {"displayValue": audit.get("displayValue", "N/A"), "numericValue": audit.get("numericValue")}
+    diagnostics = {}
+    for key in DIAGNOSTIC_KEYS:
+        audit = audits.get(key, {})
+        if audit and audit.get("scoreDisplayMode") != "notApplicable":
+            diagnostics[key] = {"title": audit.get("title", key), "displayValue": audit.get("displayValue", "N/A")}
+    return {
+        "url": url,
+        "strategy": strategy,
+        "fetchTime": lighthouse.get("fetchTime"),
+        "performanceScore": lighthouse.get("categories", {}).get("performance", {}).get("score"),
+        "vitals": vitals,
+        "diagnostics": diagnostics,
+    }
+
+
+class PageSpeedStore:
+    """Local SQLite history of PageSpeed runs keyed by (url, strategy, fetchTime)"""
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " url TEXT NOT NULL, strategy TEXT NOT NULL, fetch_time TEXT NOT NULL,"
+            " performance_score REAL, result TEXT NOT NULL,"
+            " PRIMARY KEY (url, strategy, fetch_time))"
+        )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def save(self, result):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO runs (url, strategy, fetch_time, performance_score, result) VALUES (?, ?, ?, ?, ?)",
+            (result["url"], result["strategy"], result["fetchTime"], result["performanceScore"], json.dumps(result)),
+        )
+
+    def latest(self, url, strategy):
+        row = self._connect().execute(
+            "SELECT result FROM runs WHERE url = ? AND strategy = ? ORDER BY fetch_time DESC LIMIT 1",
+            (url, strategy),
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def history(self, url, strategy, limit=100):
+        """(fetchTime, performanceScore) pairs, oldest first"""
+        rows = self._connect().execute(
+            "SELECT fetch_time, performance_score FROM runs WHERE url = ? AND strategy = ?"
+            " ORDER BY fetch_time DESC LIMIT ?",
+            (url, strategy, limit),
+        ).fetchall()
+        return rows[::-1]
+
+    def runs(self, url=None, strategy=None):
+        """Yield stored results oldest first, optionally for one url and/or strategy, without loading them all"""
+        sql, args = "SELECT result FROM runs WHERE 1 = 1", []
+        if url is not None:
+            sql += " AND url = ?"
+            args.append(url)
+        if strategy is not None:
+            sql += " AND strategy = ?"
+            args.append(strategy)
+        for (result,) in self._connect().execute(sql + " ORDER BY url, strategy, fetch_time", args):
+            yield json.loads(result)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = PageSpeedStore()
+    return _store
+
+
+def analyze(url, strategy, store=None):
+    """Run one analysis, persist it and return the extracted result"""
+    result = extract_result(url, strategy, run_pagespeed(url, strategy))
+    (store or get_store()).save(result)
+    return result
+
+
+def run_batch(urls, strategies=STRATEGIES, concurrency=4, store=None):
+    """Analyze every url x strategy pair; yields (url, strategy, result, error) as each run finishes"""
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {
+            executor.submit(analyze, url, strategy, store): (url, strategy)
+            for url in urls for strategy in strategies
+        }
+        for future in as_completed(futures):
+            url, strategy = futures[future]
+            try:
+                yield url, strategy, future.result(), None
+            except Exception as e:
+                yield url, strategy, None, e
@@ -1,83 +1,91 @@
 import streamlit as st
-import requests
 from datetime import datetime
+from export import pagespeed_records
+from pagespeed import CORE_WEB_VITALS, STRATEGIES, analyze, get_store, run_batch
+from views.export import render_export
 
 # --- Page Config ---
 st.set_page_config(page_title="PageSpeed Score", page_icon="🚀", layout="centered")
 st.title("🚀 Google PageSpeed Insights Checker")
 
-# --- API KEY ---
-API_KEY = ""  # Replace with your own API key if needed
+
+def render_result(result):
+    # --- Lighthouse Performance Score Only ---
+    st.subheader("📊 Lighthouse Category Score")
+    performance_score = result.get("performanceScore")
+    if performance_score is not None:
+        st.metric("🚀 Performance", f"{int(performance_score * 100)} / 100")
+    else:
+        st.warning("Performance score not available.")
+
+    st.divider()
+
+    # --- Core Web Vitals ---
+    st.subheader("⚡ Core Web Vitals")
+    col1, col2 = st.columns(2)
+    half = len(CORE_WEB_VITALS) // 2
+    for i, (label, key) in enumerate(CORE_WEB_VITALS):
+        col = col1 if i < half else col2
+        col.metric(label, result["vitals"].get(key, {}).get("displayValue", "N/A"))
+
+    st.divider()
+
+    # --- Additional Diagnostics ---
+    st.subheader("🛠 Additional Diagnostics")
+    for key, item in result["diagnostics"].items():
+        st.write(f"**{item.get('title', key)}** — {item.get('displayValue', 'N/A')}")
+
+    st.divider()
+
+    # --- Timestamp ---
+    if result.get("fetchTime"):
+        ts = datetime.strptime(result["fetchTime"], "%Y-%m-%dT%H:%M:%S.%fZ")
+        st.markdown(f"📅 **Analysis Timestamp:** {ts.strftime('%b %d, %Y %I:%M %p')}")
+
+
+def render_trend(url, strategy):
+    history = get_store().history(url, strategy)
+    scored = [(fetch_time, score) for fetch_time, score in history if score is not None]
+    if len(scored) > 1:
+        st.subheader("📈 Performance Trend")
+        st.line_chart({
+            "Performance": {datetime.strptime(t, "%Y-%m-%dT%H:%M:%S.%fZ"): int(s * 100) for t, s in scored}
+        })
+
 
 # --- Input Fields ---
 url = st.text_input("Enter full website URL (include https://):", "https://web.dev/")
-strategy = st.radio("Choose device type:", ["mobile", "desktop"])
+strategy = st.radio("Choose device type:", STRATEGIES)
 
 # --- On Button Click ---
 if st.button("Run Analysis"):
-    st.info("Fetching performance data...")
-
-    api_url = (
-        f"https://www.googleapis.com/pagespeedonline/v5/runPagespeed"
-        f"?url={url}&strategy={strategy}&key={API_KEY}"
-    )
-
-    try:
-        response = requests.get(api_url)
-        data = response.json()
-
-        lighthouse = data.get("lighthouseResult", {})
-        audits = lighthouse.get("audits", {})
-        categories = lighthouse.get("categories", {})
-
-        # --- Lighthouse Performance Score Only ---
-        st.subheader("📊 Lighthouse Category Score")
-        performance_score = categories.get("performance", {}).get("score")
-        if performance_score is not None:
-            st.metric("🚀 Performance", f"{int(performance_score * 100)} / 100")
-        else:
-            st.warning("Performance score not available.")
-
-        st.divider()
-
-        # --- Core Web Vitals ---
-        st.subheader("⚡ Core Web Vitals")
-        col1, col2 = st.columns(2)
-
-        def safe_metric(label, key, col):
-            val = audits.get(key, {}).get("displayValue", "N/A")
-            col.metric(label, val)
-
-        safe_metric("Speed Index", "speed-index", col1)
-        safe_metric("First Contentful Paint", "first-contentful-paint", col1)
-        safe_metric("Largest Contentful Paint", "largest-contentful-paint", col1)
-
-        safe_metric("Time to Interactive", "interactive", col2)
-        safe_metric("Total Blocking Time", "total-blocking-time", col2)
-        safe_metric("Cumulative Layout Shift", "cumulative-layout-shift", col2)
-
-        st.divider()
-
-        # --- Additional Diagnostics ---
-        st.subheader("🛠 Additional Diagnostics")
-        diagnostic_keys = [
-            "uses-long-cache-ttl", "uses-optimized-images", "dom-size",
-            "render-blocking-resources", "bootup-time", "main-thread-tasks",
-            "unminified-css", "unminified-javascript", "uses-text-compression",
-            "uses-responsive-images", "uses-webp-images"
-        ]
-
-        for key in diagnostic_keys:
-            item = audits.get(key, {})
-            if item and item.get("scoreDisplayMode") != "notApplicable":
-                st.write(f"**{item.get('title', key)}** — {item.get('displayValue', 'N/A')}")
-
-        st.divider()
-
-        # --- Timestamp ---
-        if lighthouse.get("fetchTime"):
-            ts = datetime.strptime(lighthouse["fetchTime"], "%Y-%m-%dT%H:%M:%S.%fZ")
-            st.markdown(f"📅 **Analysis Timestamp:** {ts.strftime('%b %d, %Y %I:%M %p')}")
-
-    except Exception as e:
-        st.error(f"❌ Error fetching data: {e}")
+    with st.spinner("Fetching performance data..."):
+        try:
+            analyze(url, strategy)
+        except Exception as e:
+            st.error(f"❌ Error fetching data: {e}")
+
+# Show the latest stored run instantly; the API is only called when asked
+latest = get_store().latest(url, strategy)
+if latest:
+    render_result(latest)
+    render_trend(url, strategy)
+    render_export("pagespeed", lambda: pagespeed_records(url), f"pagespeed-{url}", "pagespeed")
+else:
+    st.info("No stored analysis for this URL yet. Click **Run Analysis** to fetch one.")
+
+# --- Batch Mode ---
+with st.expander("📋 Batch mode"):
+    batch_urls = st.text_area("URLs (one per line)")
+    concurrency = st.slider("Concurrent runs", min_value=1, max_value=8, value=4)
+    if st.button("Run batch (mobile + desktop)"):
+        urls = list(dict.fromkeys(line.strip() for line in batch_urls.splitlines() if line.strip()))
+        progress = st.progress(0.0)
+        total = len(urls) * len(STRATEGIES)
+        for done, (run_url, run_strategy, result, error) in enumerate(run_batch(urls, STRATEGIES, concurrency), start=1):
+            progress.progress(done / total)
+            if error is not None:
+                st.write(f"❌ {run_url} ({run_strategy}): {error}")
+            else:
+                score = result["performanceScore"]
+                st.write(f"✅ {run_url} ({run_strategy}): {int(score * 100) if score is not None else 'N/A'} / 100")
@@ -0,0 +1,36 @@
+"""Run PageSpeed for many URLs (mobile and desktop) and store every result.
+
+    python pagespeed_batch.py urls.txt --concurrency 4
+"""
+import argparse
+import sys
+
+from pagespeed import STRATEGIES, run_batch
+
+
+def read_urls(path):
+    with open(path, encoding="utf-8") as f:
+        return list(dict.fromkeys(line.split("#", 1)[0].strip() for line in f if line.split("#", 1)[0].strip()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch PageSpeed Insights runner")
+    parser.add_argument("urls_file", help="Text file with one URL per line (# comments allowed)")
+    parser.add_argument("--strategy", choices=STRATEGIES, action="append", help="Repeatable; defaults to both")
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for url, strategy, result, error in run_batch(read_urls(args.urls_file), args.strategy or STRATEGIES, args.concurrency):
+        if error is not None:
+            failed += 1
+            print(f"[error] {url} ({strategy}): {error}", file=sys.stderr)
+            continue
+        score = result["performanceScore"]
+        score_text = f"{int(score * 100)}/100" if score is not None else "N/A"
+        print(f"[ok] {url} ({strategy}): {score_text} at {result['fetchTime']}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+import contextvars
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+
+from api_client import ApiError
+from response_cache import CACHE_DIR
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursting up to `capacity`"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Take tokens if available; otherwise return how many seconds until they will be"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens=1):
+        while True:
+            wait = self.try_acquire(tokens)
+            if not wait:
+                return
+            time.sleep(wait)
+
+
+# ========== SHARED API BUDGET ==========
+BUDGET_PATH = os.path.join(CACHE_DIR, "api_budget.sqlite3")
+API_RATE = float(os.environ.get("SCRAPECREATORS_RATE", 5))  # tokens per second, shared by every process
+API_BURST = float(os.environ.get("SCRAPECREATORS_BURST", 10))
+DAILY_CREDITS = int(os.environ.get("SCRAPECREATORS_DAILY_CREDITS", 0))  # 0 = no daily cap
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+PRIORITIES = [INTERACTIVE, BULK]
+MAX_WAIT = {INTERACTIVE: 20.0, BULK: 600.0}  # seconds a caller may queue before giving up
+
+# Who is calling the API from this thread/context: (session_id, priority)
+_caller = contextvars.ContextVar("api_caller", default=("background", BULK))
+
+
+class RateLimitExceeded(ApiError):
+    """Raised instead of calling upstream when the shared rate or credit budget is used up"""
+
+    def __init__(self, message):
+        super().__init__(429, message)
+
+
+def set_caller(session_id, priority=INTERACTIVE):
+    _caller.set((str(session_id), priority))
+
+
+def current_caller():
+    return _caller.get()
+
+
+def bind_caller(fn):
+    """Wrap fn so it runs as the current caller when executed on another thread"""
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+
+def bind_streamlit_session():
+    """Attribute API calls from this script run to the viewer's Streamlit session"""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    set_caller(ctx.session_id if ctx else "streamlit", INTERACTIVE)
+
+
+_BUDGET_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bucket (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ledger (
+    ts REAL NOT NULL,
+    day TEXT NOT NULL,
+    session TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    credits INTEGER NOT NULL,
+    status INTEGER
+);
+CREATE INDEX IF NOT EXISTS ledger_by_day ON ledger (day);
+"""
+
+
+def _today():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+class SharedTokenBucket:
+    """Token bucket whose state lives in SQLite, so every process on the host draws from one budget"""
+
+    def __init__(self, name="scrapecreators", rate=API_RATE, capacity=API_BURST, path=BUDGET_PATH):
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._connect().executescript(_BUDGET_SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def try_acquire(self, tokens=1):
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM bucket WHERE name = ?", (self.name,)).fetchone()
+            available = self.capacity if row is None else min(self.capacity, row[0] + (now - row[1]) * self.rate)
+            wait = 0.0
+            if available >= tokens:
+                available -= tokens
+            else:
+                wait = (tokens - available) / self.rate
+            conn.execute("INSERT OR REPLACE INTO bucket (name, tokens, updated) VALUES (?, ?, ?)", (self.name, available, now))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def credits_spent(self, day=None):
+        row = self._connect().execute("SELECT COALESCE(SUM(credits), 0) FROM ledger WHERE day = ?", (day or _today(),)).fetchone()
+        return row[0]
+
+    def record(self, session, priority, endpoint, credits, status):
+        self._connect().execute(
+            "INSERT INTO ledger (ts, day, session, priority, endpoint, credits, status) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (time.time(), _today(), session, priority, endpoint, credits, status),
+        )
+
+    def ledger_summary(self, day=None, by="endpoint"):
+        """Credits and call counts for one day grouped by "endpoint" or "session\""""
+        column = {"endpoint": "endpoint", "session": "session"}[by]
+        rows = self._connect().execute(
+            f"SELECT {column}, COUNT(*), SUM(credits) FROM ledger WHERE day = ? GROUP BY {column} ORDER BY SUM(credits) DESC",
+            (day or _today(),),
+        ).fetchall()
+        return [{by: key, "calls": calls, "credits": credits} for key, calls, credits in rows]
+
+
+class FairScheduler:
+    """Hands out bucket tokens round-robin across sessions, interactive callers before bulk ones.
+
+    Each session has its own FIFO queue; whichever session is at the front of
+    the highest-priority class gets the next token and then moves to the back,
+    so one session issuing hundreds of calls cannot starve the others. The
+    bucket itself (a cross-process SQLite transaction) is probed outside the
+    condition, so lock contention there never stalls the other waiters.
+    """
+
+    def __init__(self, bucket, daily_credits=DAILY_CREDITS):
+        self.bucket = bucket
+        self.daily_credits = daily_credits
+        self._cond = threading.Condition()
+        self._queues = {priority: OrderedDict() for priority in PRIORITIES}
+        self._probing = False  # a head-of-queue caller is asking the bucket for a token
+
+    def _is_next(self, priority, session, ticket):
+        for klass in PRIORITIES:
+            queue = self._queues[klass]
+            if queue:
+                head_session, tickets = next(iter(queue.items()))
+                return klass == priority and head_session == session and tickets[0] is ticket
+        return False
+
+    def _leave(self, priority, session, ticket, served):
+        queue = self._queues[priority]
+        tickets = queue[session]
+        tickets.remove(ticket)
+        if not tickets:
+            del queue[session]
+        elif served:
+            queue.move_to_end(session)
+        self._cond.notify_all()
+
+    def acquire(self, endpoint, weight=1):
+        """Block until this caller may make one upstream call; raises RateLimitExceeded"""
+        session, priority = current_caller()
+        if self.daily_credits and self.bucket.credits_spent() + weight > self.daily_credits:
+            raise RateLimitExceeded(f"Daily API credit budget of {self.daily_credits} is used up")
+
+        deadline = time.monotonic() + MAX_WAIT[priority]
+        ticket = object()
+        with self._cond:
+            self._queues[priority].setdefault(session, deque()).append(ticket)
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._leave(priority, session, ticket, served=False)
+                    raise RateLimitExceeded(f"Timed out waiting for the shared API rate limit ({endpoint})")
+                if self._probing or not self._is_next(priority, session, ticket):
+                    self._cond.wait(min(0.5, remaining))
+                    continue
+                self._probing = True
+                self._cond.release()
+                wait = None
+                try:
+                    wait = self.bucket.try_acquire(weight)
+                finally:
+                    self._cond.acquire()
+                    self._probing = False
+                    if wait is None:  # the bucket raised; give up our place in line
+                        self._leave(priority, session, ticket, served=False)
+                    else:
+                        self._cond.notify_all()
+                if not wait:
+                    self._leave(priority, session, ticket, served=True)
+                    return session, priority
+                self._cond.wait(min(wait, remaining))
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = FairScheduler(SharedTokenBucket())
+    return _scheduler
@@ -0,0 +1,270 @@
+"""Time series of Instagram reel counters and profile follower counts, snapshotted on every fetch.
+
+Each series is one row: its timestamps and counters as delta-encoded int64
+arrays, zlib-compressed. New snapshots go to a short tail that is folded
+into the sealed history every TAIL_POINTS snapshots, so an append re-encodes
+a few hundred points rather than months of them. Growth analytics decode
+every series of a profile into flat arrays and compute windowed velocities
+for all of them at once.
+"""
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from ad_tables import REEL_COUNT_COLUMNS
+from response_cache import CACHE_DIR
+
+# ========== CONFIG ==========
+METRICS_PATH = os.path.join(CACHE_DIR, "reel_metrics.sqlite3")
+TAIL_POINTS = 256  # snapshots held in the tail before it is folded into the compressed history
+MIN_SNAPSHOT_INTERVAL = 60  # seconds; a series seen again sooner (e.g. by two endpoints) is not re-snapshotted
+DEFAULT_WINDOW = 24 * 60 * 60
+REEL = "reel"
+PROFILE = "profile"
+METRICS = {REEL: REEL_COUNT_COLUMNS, PROFILE: ["follower_count"]}
+MISSING = -1  # counters are never negative, so -1 marks "not reported" in the int64 arrays
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    handle TEXT,
+    points INTEGER NOT NULL,
+    tail_points INTEGER NOT NULL,
+    last_at INTEGER NOT NULL,
+    times BLOB NOT NULL,
+    counts BLOB NOT NULL,
+    tail_times BLOB NOT NULL,
+    tail_counts BLOB NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+CREATE INDEX IF NOT EXISTS series_by_handle ON series (kind, handle);
+"""
+
+
+# ========== ENCODING ==========
+def encode(array):
+    """Delta-encode an (n,) or (n, m) int64 array along time, column by column, and compress it"""
+    array = np.asarray(array, dtype=np.int64)
+    deltas = np.diff(array, axis=0, prepend=np.zeros((1,) + array.shape[1:], dtype=np.int64))
+    return zlib.compress(np.ascontiguousarray(deltas.T).tobytes())
+
+
+def decode(blob, points, columns=None):
+    deltas = np.frombuffer(zlib.decompress(blob), dtype=np.int64)
+    if columns is None:
+        return np.cumsum(deltas)
+    return np.cumsum(deltas.reshape(columns, points).T, axis=0)
+
+
+def _count(value):
+    return int(value) if isinstance(value, (int, float)) and value >= 0 else MISSING
+
+
+def reel_counts(items):
+    """{code: counters} from either reels endpoint's items"""
+    counts = {}
+    for item in items:
+        media = item.get("media") or item
+        if media.get("code"):
+            counts[media["code"]] = [
+                _count(media.get("play_count") or media.get("ig_play_count")),
+                _count(media.get("like_count")),
+                _count(media.get("share_count")),
+                _count(media.get("comment_count")),
+            ]
+    return counts
+
+
+class ReelMetricsStore:
+    """One compressed row per reel or profile series, appended to as new snapshots arrive"""
+
+    def __init__(self, path=METRICS_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def append(self, kind, handle, snapshots, observed_at=None):
+        """Add one snapshot per series from {key: counters}; returns how many series grew"""
+        if not snapshots:
+            return 0
+        now = int(observed_at or time.time())
+        columns = len(METRICS[kind])
+        empty_times, empty_counts = encode(np.empty(0)), encode(np.empty((0, columns)))
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            keys = list(snapshots)
+            existing = {}
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                rows = conn.execute(
+                    "SELECT key, points, tail_points, last_at, times, counts, tail_times, tail_counts FROM series"
+                    f" WHERE kind = ? AND key IN ({', '.join('?' * len(chunk))})",
+                    [kind] + chunk,
+                )
+                existing.update((row[0], row[1:]) for row in rows)
+            inserts, appends, seals = [], [], []
+            for key, counts in snapshots.items():
+                row = np.asarray([counts], dtype=np.int64)
+                if key not in existing:
+                    inserts.append((kind, key, handle, now, encode([now]), encode(row), empty_times, empty_counts))
+                    continue
+                points, tail_points, last_at, times_blob, counts_blob, tail_times_blob, tail_counts_blob = existing[key]
+                if now - last_at < MIN_SNAPSHOT_INTERVAL:
+                    continue
+                tail_times = np.append(decode(tail_times_blob, tail_points), now)
+                tail_counts = np.vstack([decode(tail_counts_blob, tail_points, columns), row])
+                if len(tail_times) < TAIL_POINTS:
+                    appends.append((handle, len(tail_times), now, encode(tail_times), encode(tail_counts), kind, key))
+                    continue
+                times = np.concatenate([decode(times_blob, points), tail_times])
+                counts = np.vstack([decode(counts_blob, points, columns), tail_counts])
+                seals.append((handle, len(times), now, encode(times), encode(counts), empty_times, empty_counts, kind, key))
+            conn.executemany(
+                "INSERT INTO series (kind, key, handle, points, tail_points, last_at, times, counts, tail_times, tail_counts)"
+                " VALUES (?, ?, ?, 1, 0, ?, ?, ?, ?, ?)",
+                inserts,
+            )
+            conn.executemany(
+                "UPDATE series SET handle = COALESCE(?, handle), tail_points = ?, last_at = ?, tail_times = ?,"
+                " tail_counts = ? WHERE kind = ? AND key = ?",
+                appends,
+            )
+            conn.executemany(
+                "UPDATE series SET handle = COALESCE(?, handle), points = ?, tail_points = 0, last_at = ?, times = ?,"
+                " counts = ?, tail_times = ?, tail_counts = ? WHERE kind = ? AND key = ?",
+                seals,
+            )
+        return len(inserts) + len(appends) + len(seals)
+
+    def record_reels(self, handle, items, observed_at=None):
+        return self.append(REEL, handle, reel_counts(items), observed_at)
+
+    def record_profile(self, handle, profile, observed_at=None):
+        user = ((profile or {}).get("data") or {}).get("user") or {}
+        followers = (user.get("edge_followed_by") or {}).get("count")
+        if followers is None or not handle:
+            return 0
+        return self.append(PROFILE, handle, {handle: [_count(followers)]}, observed_at)
+
+    def series(self, kind, handle=None, keys=None):
+        """[(key, times, counts)] with times as epoch seconds and counts as float (NaN if not reported)"""
+        sql = "SELECT key, points, tail_points, times, counts, tail_times, tail_counts FROM series WHERE kind = ?"
+        args = [kind]
+        if handle is not None:
+            sql += " AND handle = ?"
+            args.append(handle)
+        if keys is not None:
+            keys = list(keys)
+            sql += f" AND key IN ({', '.join('?' * len(keys))})"
+            args += keys
+        columns = len(METRICS[kind])
+        result = []
+        for key, points, tail_points, times, counts, tail_times, tail_counts in self._connect().execute(sql, args):
+            values = np.vstack([decode(counts, points, columns), decode(tail_counts, tail_points, columns)]).astype(float)
+            values[values < 0] = np.nan
+            result.append((key, np.concatenate([decode(times, points), decode(tail_times, tail_points)]), values))
+        return result
+
+    def stats(self):
+        rows = self._connect().execute(
+            "SELECT kind, COUNT(*), COALESCE(SUM(points + tail_points), 0),"
+            " COALESCE(SUM(LENGTH(times) + LENGTH(counts) + LENGTH(tail_times) + LENGTH(tail_counts)), 0)"
+            " FROM series GROUP BY kind"
+        )
+        return {kind: {"series": count, "points": points, "bytes": size} for kind, count, points, size in rows}
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_metrics_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ReelMetricsStore()
+    return _store
+
+
+# ========== ANALYTICS ==========
+def _flatten(series, column):
+    lengths = np.fromiter((len(times) for _, times, _ in series), dtype=np.int64, count=len(series))
+    ends = np.cumsum(lengths)
+    ids = np.repeat(np.arange(len(series), dtype=np.int64), lengths)
+    times = np.concatenate([times for _, times, _ in series]) if series else np.empty(0, dtype=np.int64)
+    values = np.concatenate([counts[:, column] for _, _, counts in series]) if series else np.empty(0)
+    return ends - lengths, ends, ids, times, values
+
+
+def growth(series, column=0, window=DEFAULT_WINDOW):
+    """Per series: latest value, per-hour velocity over the last window and the one before it,
+    growth over the window and acceleration (velocity now / velocity before).
+
+    Every series is flattened into one array keyed by (series, time), so the
+    window boundaries for all of them come from a single searchsorted.
+    """
+    columns = ["latest", "velocity_per_hour", "growth_pct", "previous_velocity_per_hour", "acceleration", "snapshots"]
+    if not series:
+        return pd.DataFrame(columns=columns)
+    starts, ends, ids, times, values = _flatten(series, column)
+    order_key = (ids << 32) | times  # series are time-sorted, so this is sorted overall
+    last = ends - 1
+
+    def value_at(offset_from):
+        # Last snapshot at or before (last time - window) in each series, clamped to its first snapshot
+        bound = (np.arange(len(series), dtype=np.int64) << 32) | np.maximum(offset_from, 0)
+        return np.maximum(np.searchsorted(order_key, bound, side="right") - 1, starts)
+
+    then = value_at(times[last] - window)
+    before = value_at(times[then] - window)
+
+    def velocity(a, b):
+        hours = (times[a] - times[b]) / 3600
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(hours > 0, (values[a] - values[b]) / hours, np.nan)
+
+    current = velocity(last, then)
+    previous = velocity(then, before)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth_pct = np.where(values[then] > 0, (values[last] - values[then]) / values[then] * 100, np.nan)
+        acceleration = np.where(previous > 0, current / previous, np.nan)
+    return pd.DataFrame(
+        {
+            "latest": values[last],
+            "velocity_per_hour": current,
+            "growth_pct": growth_pct,
+            "previous_velocity_per_hour": previous,
+            "acceleration": acceleration,
+            "snapshots": ends - starts,
+        },
+        index=pd.Index([key for key, _, _ in series], name="key"),
+        columns=columns,
+    )
+
+
+def history(series, column=0):
+    """Long frame of (key, time, value) for charting"""
+    _, _, ids, times, values = _flatten(series, column)
+    keys = np.array([key for key, _, _ in series], dtype=object)
+    return pd.DataFrame({
+        "key": keys[ids] if len(ids) else [],
+        "time": pd.to_datetime(times, unit="s", utc=True),
+        "value": values,
+    })
@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import count
+from singleflight import SingleFlight
+
+# ========== CONFIG ==========
+CACHE_DIR = os.environ.get("ADS_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+CACHE_PATH = os.path.join(CACHE_DIR, "responses.sqlite3")
+MAX_CACHE_BYTES = int(os.environ.get("ADS_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+DEFAULT_TTL = 60 * 60
+STALE_GRACE = 7 * 24 * 60 * 60  # how long past its TTL an entry may still be served while refreshing
+REFRESH_LEASE = 120
+REFRESH_WORKERS = 4
+
+# Params whose values are case-insensitive upstream, so "Nike" and "nike " share an entry
+CASE_INSENSITIVE_PARAMS = {"domain", "handle", "query"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    endpoint TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    refreshing_until REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at);
+"""
+
+
+def normalize_params(params):
+    normalized = {}
+    for name, value in (params or {}).items():
+        if value is None:
+            continue
+        value = str(value).strip()
+        if name in CASE_INSENSITIVE_PARAMS:
+            value = value.lower()
+        normalized[name] = value
+    return normalized
+
+
+def make_key(endpoint, params):
+    raw = json.dumps([endpoint, normalize_params(params)], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed JSON cache with per-entry TTL, LRU eviction and stale-while-revalidate.
+
+    The database runs in WAL mode so every Streamlit worker process on the host
+    reads and writes the same file; background refreshes are claimed with a
+    lease column so only one process refreshes a given entry at a time.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_CACHE_BYTES, stale_grace=STALE_GRACE):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.stale_grace = stale_grace
+        self._local = threading.local()
+        self._refresher = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix="cache-refresh")
+        self._flight = SingleFlight()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, endpoint, params, max_age=None):
+        """Return (value, is_fresh) for a cached response, or None (also if older than max_age seconds)"""
+        key = make_key(endpoint, params)
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute("SELECT payload, expires_at, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        payload, expires_at, created_at = row
+        if max_age is not None and now - created_at > max_age:
+            return None
+        conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(zlib.decompress(payload)), now < expires_at
+
+    def set(self, endpoint, params, value, ttl=DEFAULT_TTL):
+        key = make_key(endpoint, params)
+        payload = zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, endpoint, payload, size, created_at, expires_at, accessed_at, refreshing_until)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, 0)",
+            (key, endpoint, payload, len(payload), now, now + ttl, now),
+        )
+        self._evict()
+
+    def get_or_fetch(self, endpoint, params, fetch, ttl=DEFAULT_TTL):
+        """Serve from cache, refreshing stale entries in the background; call fetch() on a miss"""
+        key = make_key(endpoint, params)
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute("SELECT payload, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            payload, expires_at = row
+            if now < expires_at + self.stale_grace:
+                conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+                if now >= expires_at:
+                    count("cache_lookups_total", endpoint=endpoint, result="stale")
+                    self._refresh_in_background(key, endpoint, params, fetch, ttl)
+                else:
+                    count("cache_lookups_total", endpoint=endpoint, result="hit")
+                return json.loads(zlib.decompress(payload))
+
+        count("cache_lookups_total", endpoint=endpoint, result="miss")
+        return self.refresh(endpoint, params, fetch, ttl)
+
+    def refresh(self, endpoint, params, fetch, ttl=DEFAULT_TTL):
+        """Bypass any cached copy: fetch now and store the result.
+
+        Concurrent refreshes of the same key share one fetch; the result is
+        stored before the flight ends, so later arrivals hit the cache instead.
+        """
+        def fetch_and_store():
+            value = fetch()
+            self.set(endpoint, params, value, ttl)
+            return value
+
+        return self._flight.do(make_key(endpoint, params), fetch_and_store, group=endpoint)
+
+    def _refresh_in_background(self, key, endpoint, params, fetch, ttl):
+        now = time.time()
+        claimed = self._connect().execute(
+            "UPDATE entries SET refreshing_until = ? WHERE key = ? AND refreshing_until < ?",
+            (now + REFRESH_LEASE, key, now),
+        ).rowcount
+        if claimed:
+            self._refresher.submit(self._refresh, endpoint, params, fetch, ttl)
+
+    def _refresh(self, endpoint, params, fetch, ttl):
+        try:
+            self.refresh(endpoint, params, fetch, ttl)
+        except Exception:
+            # Keep serving the stale copy; the lease expires and a later read retries
+            pass
+
+    def _evict(self):
+        conn = self._connect()
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        to_free = total - self.max_bytes
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed_at"):
+            victims.append((key,))
+            to_free -= size
+            if to_free <= 0:
+                break
+        conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+
+    def stats(self):
+        count, size = self._connect().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"entries": count, "bytes": size, "max_bytes": self.max_bytes}
+
+    def coalescing_stats(self):
+        """{endpoint: {"executed", "coalesced"}} upstream fetches in this process"""
+        return self._flight.stats()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
@@ -0,0 +1,139 @@
+from api_client import ApiError, get_json
+from metrics import timer
+from rate_limit import RateLimitExceeded, get_scheduler
+from response_cache import get_cache, normalize_params
+
+# ========== ENDPOINTS ==========
+COMPANY_SEARCH = "/v1/facebook/adLibrary/search/companies"
+COMPANY_ADS = "/v1/facebook/adLibrary/company/ads"
+GOOGLE_ADS = "/v1/google/company/ads"
+INSTAGRAM_PROFILE = "/v1/instagram/profile"
+INSTAGRAM_REELS = "/v1/instagram/user/reels/simple"
+INSTAGRAM_REELS_PAGED = "/v1/instagram/user/reels"
+
+# Seconds before a cached response is considered stale and refreshed in the background
+ENDPOINT_TTLS = {
+    COMPANY_SEARCH: 24 * 60 * 60,
+    COMPANY_ADS: 60 * 60,
+    GOOGLE_ADS: 6 * 60 * 60,
+    INSTAGRAM_PROFILE: 60 * 60,
+    INSTAGRAM_REELS: 30 * 60,
+    INSTAGRAM_REELS_PAGED: 30 * 60,
+}
+
+# Rate-limit tokens and credits charged per upstream call
+ENDPOINT_WEIGHTS = {
+    COMPANY_SEARCH: 1,
+    COMPANY_ADS: 1,
+    GOOGLE_ADS: 1,
+    INSTAGRAM_PROFILE: 1,
+    INSTAGRAM_REELS: 1,
+    INSTAGRAM_REELS_PAGED: 1,
+}
+
+
+def limited_get_json(path, params):
+    """get_json behind the shared fair-share rate limiter, recorded in the credit ledger"""
+    scheduler = get_scheduler()
+    weight = ENDPOINT_WEIGHTS.get(path, 1)
+    session, priority = scheduler.acquire(path, weight)
+    status = None
+    try:
+        value = get_json(path, params)
+        status = 200
+        return value
+    except ApiError as e:
+        status = e.status_code
+        raise
+    finally:
+        scheduler.bucket.record(session, priority, path, weight, status)
+
+
+def _cached(path, params, fetch, fresh=False, max_age=None):
+    with timer("fetch_seconds", endpoint=path):
+        return _cached_lookup(path, params, fetch, fresh, max_age)
+
+
+def _cached_lookup(path, params, fetch, fresh, max_age):
+    cache = get_cache()
+    if fresh and max_age is not None:
+        recent = cache.get(path, params, max_age=max_age)
+        if recent is not None:
+            return recent[0]
+    lookup = cache.refresh if fresh else cache.get_or_fetch
+    try:
+        return lookup(path, params, fetch, ttl=ENDPOINT_TTLS[path])
+    except RateLimitExceeded:
+        # Out of budget: any cached copy, however old, beats an error
+        cached = cache.get(path, params)
+        if cached is None:
+            raise
+        return cached[0]
+
+
+def _observed(path, params, data):
+    """Feed an upstream response to the creative index and the reel metrics history"""
+    # Imported here: both modules read this module's endpoint constants or are heavy to load
+    from creative_index import get_index
+    from reel_metrics import get_metrics_store
+
+    try:
+        get_index().add_response(path, params, data)
+    except Exception:
+        pass  # the search index is best-effort; never fail a fetch over it
+    try:
+        handle = normalize_params(params).get("handle")
+        if path == INSTAGRAM_PROFILE:
+            get_metrics_store().record_profile(handle, data)
+        elif path == INSTAGRAM_REELS and isinstance(data, list):
+            get_metrics_store().record_reels(handle, data)
+        elif path == INSTAGRAM_REELS_PAGED and isinstance(data, dict):
+            get_metrics_store().record_reels(handle, data.get("items") or [])
+    except Exception:
+        pass  # likewise best-effort
+    return data
+
+
+def cached_get_json(path, params, fresh=False, max_age=None):
+    """GET through the response cache; fresh=True skips the cached copy (unless younger than max_age
+    seconds) but still stores the result. Every upstream response is added to the creative index
+    and the reel metrics history."""
+    return _cached(path, params, lambda: _observed(path, params, limited_get_json(path, params)), fresh, max_age)
+
+
+def search_companies(query):
+    return cached_get_json(COMPANY_SEARCH, {"query": query})
+
+
+def company_ads_params(page_id, cursor=None):
+    return {"pageId": page_id, "cursor": cursor}
+
+
+def get_company_ads(page_id, cursor=None, fresh=False, max_age=None):
+    """One page of a company's ads; pass the previous response's "cursor" for the next page"""
+    return cached_get_json(COMPANY_ADS, company_ads_params(page_id, cursor), fresh, max_age)
+
+
+def get_google_ads(domain, fresh=False):
+    return cached_get_json(GOOGLE_ADS, {"domain": domain}, fresh).get("ads", [])
+
+
+def _fetch_instagram_profile(handle):
+    profile = limited_get_json(INSTAGRAM_PROFILE, {"handle": handle})
+    if not profile.get("success"):
+        # Failed lookups come back as 200 with success=false; don't cache them
+        raise ApiError(200, str(profile.get("message") or profile.get("error") or "profile lookup failed"))
+    return _observed(INSTAGRAM_PROFILE, {"handle": handle}, profile)
+
+
+def get_instagram_profile(handle, fresh=False):
+    return _cached(INSTAGRAM_PROFILE, {"handle": handle}, lambda: _fetch_instagram_profile(handle), fresh)
+
+
+def get_instagram_reels(handle, amount, fresh=False):
+    return cached_get_json(INSTAGRAM_REELS, {"handle": handle, "amount": amount}, fresh)
+
+
+def get_instagram_reels_page(handle, max_id=None):
+    """One page of reels; pass paging_info.max_id from the previous page to continue"""
+    return cached_get_json(INSTAGRAM_REELS_PAGED, {"handle": handle, "max_id": max_id})
@@ -0,0 +1,59 @@
+import threading
+from collections import defaultdict
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one execution.
+
+    The first caller for a key runs fn; everyone arriving while it is in flight
+    waits and receives the same result (or exception). Streamlit serves every
+    session from threads of one process, so this dedupes across sessions.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {"executed": 0, "coalesced": 0})
+
+    def do(self, key, fn, group="default"):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._stats[group]["executed"] += 1
+            else:
+                self._stats[group]["coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = fn()
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self):
+        """{group: {"executed", "coalesced"}} since process start"""
+        with self._lock:
+            return {group: dict(counts) for group, counts in self._stats.items()}
@@ -0,0 +1,162 @@
+import hashlib
+import io
+import os
+import threading
+import uuid
+
+from PIL import Image, features
+
+from media_prefetch import MediaPrefetcher, download_media
+from metrics import timer
+from response_cache import CACHE_DIR
+
+# ========== CONFIG ==========
+THUMBNAIL_DIR = os.path.join(CACHE_DIR, "thumbnails")
+MAX_THUMBNAIL_BYTES = int(os.environ.get("ADS_THUMBNAIL_MAX_BYTES", 512 * 1024 * 1024))
+# Longest edge in pixels; logos are drawn at width=100 so 2x covers high-DPI screens
+SIZES = {"logo": 200, "card": 800, "full": 1600}
+QUALITY = 80
+
+if features.check("webp"):
+    FORMAT, EXTENSION = "WEBP", "webp"
+else:
+    FORMAT, EXTENSION = "JPEG", "jpg"
+
+
+def url_digest(url):
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def thumbnail_path(url, size):
+    digest = url_digest(url)
+    return os.path.join(THUMBNAIL_DIR, digest[:2], f"{digest}-{size}.{EXTENSION}")
+
+
+class ThumbnailStore:
+    """Byte-capped directory of cached files (thumbnails, media), evicted oldest-mtime first"""
+
+    def __init__(self, root=THUMBNAIL_DIR, max_bytes=MAX_THUMBNAIL_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._total = None
+        self._lock = threading.Lock()
+
+    def _scan(self):
+        entries = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith(".tmp"):
+                    continue  # still being written
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def write(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        self.commit(tmp_path, path, len(data))
+
+    def commit(self, tmp_path, path, size):
+        """Move a finished temporary file into place, evicting old files if over the cap"""
+        os.replace(tmp_path, path)
+        with self._lock:
+            if self._total is None:
+                self._total = sum(size for _, size, _ in self._scan())
+            else:
+                self._total += size
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Other processes write here too, so rescan instead of trusting the running total
+        entries = sorted(self._scan())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+        self._total = total
+
+    def read(self, path):
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        self.touch(path)
+        return data
+
+    def touch(self, path):
+        """Mark path as recently used for eviction; False if it is not cached"""
+        try:
+            os.utime(path)
+            return True
+        except OSError:
+            return False
+
+
+_store = ThumbnailStore()
+
+
+def _encode(image, edge):
+    variant = image.copy()
+    variant.thumbnail((edge, edge), Image.LANCZOS)
+    if FORMAT == "JPEG" and variant.mode != "RGB":
+        variant = variant.convert("RGB")
+    buffer = io.BytesIO()
+    variant.save(buffer, FORMAT, quality=QUALITY)
+    return buffer.getvalue()
+
+
+def build_thumbnails(url):
+    """Download url once and cache every size; returns {size: path}, or None if the download failed"""
+    paths = {size: thumbnail_path(url, size) for size in SIZES}
+    if all(os.path.exists(path) for path in paths.values()):
+        return paths
+
+    with timer("media_download_seconds"):
+        content = download_media(url)
+    if content is None:
+        return None
+    with timer("image_decode_seconds"):
+        image = Image.open(io.BytesIO(content))
+        # Let the JPEG decoder skip straight to roughly the largest size we keep
+        image.draft("RGB", (SIZES["full"], SIZES["full"]))
+        image.load()
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if image.mode in ("LA", "PA", "P") else "RGB")
+
+    with timer("thumbnail_encode_seconds"):
+        for size, edge in SIZES.items():
+            _store.write(paths[size], _encode(image, edge))
+    return paths
+
+
+def read_thumbnail(url, size):
+    """Encoded thumbnail bytes for url at one of SIZES, or None if not cached"""
+    return _store.read(thumbnail_path(url, size))
+
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_thumbnail_prefetcher():
+    """MediaPrefetcher whose jobs download and downscale images into the thumbnail cache"""
+    global _prefetcher
+    if _prefetcher is None:
+        with _prefetcher_lock:
+            if _prefetcher is None:
+                _prefetcher = MediaPrefetcher(loader=build_thumbnails)
+    return _prefetcher
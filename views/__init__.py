@@ -0,0 +1 @@
+"""Platform views shared by the standalone apps and the unified dashboard; each module exposes render()"""
@@ -0,0 +1,36 @@
+import contextvars
+import re
+import tempfile
+
+import streamlit as st
+
+from export import FIELDS, FORMATS, MIME_TYPES, export
+from rate_limit import current_caller, set_caller
+
+_UNSAFE = re.compile(r"[^\w.-]+")
+
+
+def render_export(kind, make_records, file_stem, key):
+    """Field and format pickers, and a download button that builds the file only when clicked"""
+    with st.expander("⬇️ Export"):
+        fields = st.multiselect("Fields", FIELDS[kind], default=FIELDS[kind], key=f"{key}_export_fields")
+        fmt = st.radio("Format", FORMATS, horizontal=True, key=f"{key}_export_format")
+        caller = current_caller()
+
+        def build():
+            # Rows stream to disk, so only the finished file is ever held in memory
+            set_caller(*caller)
+            with tempfile.TemporaryFile() as out:
+                export(kind, make_records(), out, fmt, fields)
+                out.seek(0)
+                return out.read()
+
+        st.download_button(
+            "Download",
+            # Runs on click, outside the script, in a fresh context that attributes upstream calls to this viewer
+            data=lambda: contextvars.copy_context().run(build),
+            file_name=f"{_UNSAFE.sub('-', file_stem).strip('-')}.{fmt}",
+            mime=MIME_TYPES[fmt],
+            disabled=not fields,
+            key=f"{key}_export_download",
+        )
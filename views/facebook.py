@@ -0,0 +1,377 @@
+import datetime
+from html import escape
+
+import streamlit as st
+
+from ad_pagination import AdPager, render_paginated_ads
+from ad_prefetch import TOP_N, rank_companies, start_prefetch
+from api_client import ApiError
+from export import facebook_records
+from fb_sync import get_sync_store
+from media_proxy import video_urls
+from metrics import timed
+from object_store import get_object_store
+from rate_limit import current_caller
+from scrapecreators import COMPANY_ADS, COMPANY_SEARCH, ENDPOINT_TTLS, get_company_ads, search_companies
+from thumbnails import get_thumbnail_prefetcher, read_thumbnail
+from views.export import render_export
+from views.formatting import format_date
+from watchlist import get_watchlist
+
+
+COMPANY_FIELDS = [
+    "name", "page_id", "likes", "verification", "category", "entity_type", "page_alias", "ig_followers", "image_uri",
+]
+
+
+def fetch_company_data(query):
+    try:
+        return search_companies(query)
+    except ApiError:
+        return None
+    except Exception as e:
+        st.error(f"An error occurred: {str(e)}")
+        return None
+
+
+def fetch_ads_data(page_id, cursor=None):
+    try:
+        return get_company_ads(page_id, cursor)
+    except ApiError:
+        return None
+    except Exception as e:
+        st.error(f"An error occurred: {str(e)}")
+        return None
+
+
+def video_player(media_url, stable_id=None, preview_url=None):
+    """Click-to-play <video>: nothing but the poster loads until the viewer presses play"""
+    src, poster = video_urls(media_url, stable_id, preview_url)
+    poster_attr = f' poster="{escape(poster, quote=True)}"' if poster else ""
+    st.html(
+        f'<video controls preload="none" playsinline{poster_attr} src="{escape(src, quote=True)}"'
+        ' style="width: 100%; max-height: 480px; border-radius: 8px; background: #000;"></video>'
+    )
+
+
+@timed("render_seconds", section="media")
+def display_media(media_url, media_type="image", stable_id=None, preview_url=None):
+    """Display image or video based on media type"""
+    if not media_url:
+        st.write("No media available")
+        return
+    
+    try:
+        if media_type == "video" or any(ext in media_url.lower() for ext in ['.mp4', '.mov', '.avi', '.webm']):
+            # Served through the local media proxy, so it is downloaded once and stays seekable
+            video_player(media_url, stable_id, preview_url)
+        else:
+            # Thumbnails were queued by the prefetcher when the ads arrived
+            if get_thumbnail_prefetcher().get(media_url):
+                st.image(read_thumbnail(media_url, "card"), use_container_width=True)
+            else:
+                st.write("Media not available")
+    except Exception as e:
+        st.write(f"Could not load media: {str(e)}")
+
+
+def ad_image_urls(ads):
+    """Image URLs display_ad_card will render, in display order"""
+    return [ad["original_image_url"] for ad in ads if ad["original_image_url"]]
+
+
+@timed("render_seconds", section="ad_card")
+def display_ad_card(ad, index):
+    """Display individual ad card from a flattened ad_tables row"""
+    with st.container():
+        st.markdown("---")
+        
+        # Ad header
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.subheader(f"Ad {index + 1}")
+        with col2:
+            status = "🟢 Active" if ad["is_active"] else "🔴 Inactive"
+            st.write(status)
+            if ad.get("variants", 1) > 1:
+                st.caption(f"🧬 {ad['variants']} near-identical variants")
+        
+        # Ad details
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.write(f"**Start Date:** {format_date(ad['start_date'])}")
+        with col2:
+            st.write(f"**Ad ID:** {ad['ad_archive_id'] or 'N/A'}")
+        with col3:
+            if ad["impressions_lower"] is not None or ad["impressions_upper"] is not None:
+                min_imp = ad["impressions_lower"] if ad["impressions_lower"] is not None else "N/A"
+                max_imp = ad["impressions_upper"] if ad["impressions_upper"] is not None else "N/A"
+                st.write(f"**Impressions:** {min_imp}-{max_imp}")
+        
+        # Ad content (first card only)
+        if ad["has_card"]:
+            # Title and body
+            if ad["card_title"]:
+                st.write(f"**Title:** {ad['card_title']}")
+            
+            if ad["card_body"]:
+                st.write(f"**Description:** {ad['card_body']}")
+            
+            # Display media (images and videos)
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                # Original image
+                if ad["original_image_url"]:
+                    st.write("**Image:**")
+                    display_media(ad["original_image_url"], "image")
+            
+            with col2:
+                # Video (if available)
+                preview = ad["video_preview_image_url"]
+                if ad["video_url"]:
+                    st.write("**Video:**")
+                    display_media(ad["video_url"], "video", f"{ad['ad_archive_id']}:video", preview)
+                elif ad["video_hd_url"]:
+                    st.write("**Video (HD):**")
+                    display_media(ad["video_hd_url"], "video", f"{ad['ad_archive_id']}:hd", preview)
+                elif ad["video_sd_url"]:
+                    st.write("**Video (SD):**")
+                    display_media(ad["video_sd_url"], "video", f"{ad['ad_archive_id']}:sd", preview)
+            
+            # Call to action
+            if ad["cta_text"]:
+                st.write(f"**Call to Action:** {ad['cta_text']}")
+            
+            # Link preview (if available)
+            if ad["link_caption"]:
+                st.write(f"**Link Caption:** {ad['link_caption']}")
+            if ad["link_description"]:
+                st.write(f"**Link Description:** {ad['link_description']}")
+        
+        # Footer info
+        col1, col2 = st.columns(2)
+        with col1:
+            if ad["platforms"]:
+                st.write(f"**Platforms:** {ad['platforms']}")
+        with col2:
+            if ad["url"]:
+                st.write(f"[View Original Ad]({ad['url']})")
+
+
+def search_results(query):
+    """Search results for query, projected to COMPANY_FIELDS and shared by every session; None if the search failed"""
+    def load():
+        data = fetch_company_data(query)
+        if not data or "searchResults" not in data:
+            return None
+        # Only keys the API sent, so the view's .get(key, default) fallbacks still apply
+        return [{field: company[field] for field in COMPANY_FIELDS if field in company} for company in data["searchResults"]]
+
+    return get_object_store().get_or_create(f"facebook_search:{query}", load, ttl=ENDPOINT_TTLS[COMPANY_SEARCH])
+
+
+def prefetch_likely_ads(results, incremental):
+    """Warm the first ads page of the likeliest picks while the user reads the results"""
+    if st.session_state.ad_prefetch_key is None:
+        st.session_state.ad_prefetch_key = f"ad_prefetch:{current_caller()[0]}"
+    page_ids = [company["page_id"] for company in rank_companies(results or []) if company.get("page_id")]
+    if incremental:
+        # Pages already in the local store render without any API call
+        store = get_sync_store()
+        page_ids = [page_id for page_id in page_ids if store.last_synced(page_id) is None]
+    # Starting replaces (and cancels) this session's previous prefetch
+    start_prefetch(st.session_state.ad_prefetch_key, page_ids[:TOP_N])
+
+
+def sync_ads(page_id):
+    """Pull only new or changed ads for page_id into the local store"""
+    try:
+        with st.spinner(f"Syncing ads for Page ID: {page_id}..."):
+            stats = get_sync_store().sync(page_id)
+        more = "" if stats["complete"] else "; older ads follow on the next refresh"
+        st.toast(f"Synced {page_id}: {stats['new']} new, {stats['updated']} updated ({stats['pages']} pages{more})")
+    except Exception as e:
+        st.error(f"Sync failed: {str(e)}")
+
+
+# Only keys and view state live in the session; the records behind them are in the shared object store
+STATE_DEFAULTS = {
+    "selected_company_key": None,
+    "page_id": "",
+    "current_search_query": "",
+    "ad_prefetch_key": None,
+}
+
+
+def _init_state():
+    for name, value in STATE_DEFAULTS.items():
+        if name not in st.session_state:
+            st.session_state[name] = value
+
+
+def render():
+    """Company search, ad sync and paginated ads for one Facebook advertiser"""
+    _init_state()
+
+    # App header
+    st.title("📊 Facebook Ads Explorer")
+    st.write("Discover companies and analyze their Facebook ad campaigns")
+
+    incremental = st.sidebar.toggle(
+        "Incremental sync",
+        value=False,
+        help="Read advertisers already synced to the local store, and refresh only their new or changed ads",
+    )
+
+    # Tab selection
+    tab = st.radio(
+        "Select Mode:",
+        ["🔍 Search Companies", "📝 Enter Page ID"],
+        horizontal=True
+    )
+
+    if tab == "🔍 Search Companies":
+        # Search form
+        with st.form("search_form"):
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                query = st.text_input("Search for a company", placeholder="Enter company name (e.g. Nike)")
+            with col2:
+                st.write("")
+                submit_button = st.form_submit_button("🔍 Search")
+
+        if submit_button and query:
+            with st.spinner("Searching for companies..."):
+                results = search_results(query)
+            st.session_state.current_search_query = query if results is not None else ""
+            prefetch_likely_ads(results, incremental)
+
+        # Display search results (re-read from the response cache if the shared copy was evicted)
+        query = st.session_state.current_search_query
+        results = search_results(query) if query else None
+        if results:
+            get_thumbnail_prefetcher().prefetch(company.get("image_uri") for company in results)
+            st.write(f"Found {len(results)} results for '{st.session_state.current_search_query}'")
+
+            for i, company in enumerate(results):
+                with st.expander(f"{company.get('name', 'N/A')} - {company.get('category', 'N/A')}"):
+                    col1, col2 = st.columns([1, 3])
+
+                    with col1:
+                        # Company image
+                        if company.get("image_uri"):
+                            try:
+                                get_thumbnail_prefetcher().get(company["image_uri"])
+                                st.image(read_thumbnail(company["image_uri"], "logo"), width=100)
+                            except:
+                                st.write("No image")
+                        else:
+                            st.write("No image")
+
+                    with col2:
+                        # Company details
+                        verification = "✅ Verified" if company.get("verification") == "VERIFIED" else "❌ Not Verified"
+                        st.write(f"**Verification:** {verification}")
+                        st.write(f"**Category:** {company.get('category', 'N/A')}")
+                        st.write(f"**Type:** {company.get('entity_type', 'N/A').replace('_', ' ').title()}")
+
+                        # Handle likes safely
+                        likes = company.get('likes')
+                        if likes is not None:
+                            st.write(f"**Likes:** {likes:,}")
+                        else:
+                            st.write("**Likes:** N/A")
+
+                        # Handle Instagram followers safely
+                        ig_followers = company.get("ig_followers")
+                        if ig_followers is not None:
+                            st.write(f"**Instagram Followers:** {ig_followers:,}")
+
+                        if company.get("page_alias"):
+                            st.write(f"**Page:** fb.com/{company.get('page_alias')}")
+
+                        st.write(f"**Page ID:** {company.get('page_id', 'N/A')}")
+
+                    if st.button(f"Select {company.get('name', 'Company')}", key=f"select_{i}"):
+                        st.session_state.selected_company_key = f"facebook_company:{company['page_id']}"
+                        get_object_store().put(st.session_state.selected_company_key, company)
+                        st.session_state.page_id = company["page_id"]
+                        st.rerun()
+
+    else:  # Enter Page ID tab
+        with st.form("page_id_form"):
+            page_id = st.text_input("Enter Facebook Page ID", placeholder="e.g. 51212153078")
+            submit_page_id = st.form_submit_button("🚀 Fetch Ads")
+
+        if submit_page_id and page_id:
+            st.session_state.page_id = page_id
+            st.session_state.selected_company_key = None
+
+    # Display ads section
+    if st.session_state.page_id:
+        st.markdown("---")
+        st.header(f"📊 Ads for Page ID: {st.session_state.page_id}")
+
+        # Show selected company info if available
+        company_key = st.session_state.selected_company_key
+        company = get_object_store().get(company_key) if company_key else None
+        if company:
+            col1, col2 = st.columns([1, 4])
+            with col1:
+                if company.get("image_uri"):
+                    try:
+                        get_thumbnail_prefetcher().get(company["image_uri"])
+                        st.image(read_thumbnail(company["image_uri"], "logo"), width=100)
+                    except:
+                        pass
+            with col2:
+                st.subheader(company.get("name", "N/A"))
+                likes = company.get('likes')
+                likes_text = f"{likes:,}" if likes is not None else "N/A"
+                st.write(f"{company.get('category', 'N/A')} • {likes_text} likes")
+
+        # Fetch and display ads, one page at a time: from the local store once a page has been synced
+        # (in incremental mode, or whenever the watchlist daemon keeps it synced), else lazily from the API
+        watched = get_watchlist().is_watched("facebook", st.session_state.page_id)
+        store = get_sync_store()
+        last_synced = store.last_synced(st.session_state.page_id) if incremental or watched else None
+        from_store = last_synced is not None
+        if incremental or watched:
+            col1, col2 = st.columns([3, 1])
+            with col2:
+                # A first sync pulls the page's full history, so it only runs when asked for
+                if st.button("🔄 Refresh ads" if from_store else "📥 Sync all ads"):
+                    sync_ads(st.session_state.page_id)
+                    last_synced = store.last_synced(st.session_state.page_id)
+                    from_store = last_synced is not None
+            with col1:
+                if from_store:
+                    synced_text = datetime.datetime.fromtimestamp(last_synced).strftime("%b %d, %Y %I:%M %p")
+                    watched_text = " • 🛰️ on the watchlist" if watched else ""
+                    st.caption(f"{store.count(st.session_state.page_id)} ads stored • last synced {synced_text}{watched_text}")
+                else:
+                    st.caption("Not synced yet • showing ads from the API")
+        if from_store:
+            # Keyed by sync time, so every session moves to the new table once a sync lands
+            pager = AdPager(st.session_state.page_id, "store", version=last_synced)
+            fetch_page = store.fetch_page
+        else:
+            pager = AdPager(st.session_state.page_id, ttl=ENDPOINT_TTLS[COMPANY_ADS])
+            fetch_page = fetch_ads_data
+
+        render_paginated_ads(
+            pager,
+            fetch_page,
+            display_ad_card,
+            on_window=lambda ads: get_thumbnail_prefetcher().prefetch(ad_image_urls(ads)),
+        )
+        if pager.failed:
+            st.error("Could not fetch ads data. Please check the Page ID and try again.")
+        elif pager.table.empty:
+            st.write("No ads found for this Page ID")
+        else:
+            page_id = st.session_state.page_id
+            render_export(
+                "facebook", lambda: facebook_records(page_id, from_store), f"facebook-ads-{page_id}", "facebook"
+            )
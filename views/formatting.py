@@ -0,0 +1,33 @@
+import datetime
+
+
+def format_date(value):
+    """Ad start dates, as ISO strings or datetimes"""
+    if not value:
+        return "N/A"
+    if isinstance(value, datetime.datetime):
+        return value.strftime("%b %d, %Y")
+    try:
+        return datetime.datetime.fromisoformat(value.replace("Z", "+00:00")).strftime("%b %d, %Y")
+    except (AttributeError, ValueError):
+        return value
+
+
+def format_shown(ts):
+    return ts.strftime("%b %d, %Y %H:%M") if ts is not None else "N/A"
+
+
+def format_number(num):
+    if not num:
+        return "NA"
+    num = int(num)
+    return f"{num/1_000_000:.1f}M" if num >= 1_000_000 else f"{num/1_000:.1f}K" if num >= 1000 else str(num)
+
+
+def format_timestamp(ts):
+    try:
+        if isinstance(ts, datetime.datetime):
+            ts = ts.timestamp()
+        return datetime.datetime.fromtimestamp(int(ts)).strftime("%B %d, %Y at %I:%M %p")
+    except (TypeError, ValueError, OverflowError, OSError):
+        return "Unknown"
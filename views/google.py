@@ -0,0 +1,50 @@
+import streamlit as st
+
+from ad_tables import google_ads_frame, records
+from api_client import ApiError
+from export import google_records
+from metrics import timer
+from scrapecreators import get_google_ads
+from views.export import render_export
+from views.formatting import format_shown
+
+
+def fetch_google_ads(domain):
+    try:
+        return get_google_ads(domain)
+    except ApiError as e:
+        st.error(f"Failed with status code: {e.status_code}")
+        return []
+    except Exception as e:
+        st.error(f"Error: {str(e)}")
+        return []
+
+
+def render():
+    """Google ad creatives for one advertiser domain"""
+    st.title("Google Ads Viewer")
+    domain = st.text_input("Enter a company domain (e.g., www.nike.com)")
+
+    if domain.strip():
+        ads = fetch_google_ads(domain)
+        if ads:
+            table = google_ads_frame(ads)
+            st.subheader(f"Found {len(table)} ads for {domain}")
+            render_export("google", lambda: google_records(domain), f"google-ads-{domain}", "google")
+
+            formats = st.multiselect("Format", sorted(table["format"].dropna().unique()))
+            if formats:
+                table = table[table["format"].isin(formats)]
+
+            with timer("render_seconds", section="google_ads"):
+                for i, ad in enumerate(records(table)):
+                    st.markdown("---")
+                    st.markdown(f"### Ad {i+1}")
+                    st.write(f"**First Shown:** {format_shown(ad['firstShown'])}")
+                    st.write(f"**Last Shown:** {format_shown(ad['lastShown'])}")
+                    st.write(f"**Format:** {(ad['format'] or 'N/A').capitalize()}")
+                    st.write(f"**Advertiser ID:** {ad['advertiserId'] or 'N/A'}")
+                    st.write(f"**Creative ID:** {ad['creativeId'] or 'N/A'}")
+                    st.markdown(f"[🔗 View Ad]({ad['adUrl']})")
+        else:
+            st.info("No ads found for this domain.")
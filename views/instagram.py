@@ -0,0 +1,112 @@
+import pandas as pd
+import streamlit as st
+
+from ad_tables import records, reels_frame
+from export import instagram_records
+from instagram_fetch import DEFAULT_REEL_COUNT, iter_reel_pages, submit
+from metrics import timer
+from reel_metrics import PROFILE, REEL, get_metrics_store, growth, history
+from response_cache import normalize_params
+from scrapecreators import get_instagram_profile
+from views.export import render_export
+from views.formatting import format_number
+from views.reels_grid import ReelsGrid
+
+
+def fetch_profile(handle):
+    try:
+        return get_instagram_profile(handle)
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+
+GROWTH_WINDOWS = {"6 hours": 6 * 60 * 60, "24 hours": 24 * 60 * 60, "7 days": 7 * 24 * 60 * 60}
+TOP_REELS_CHARTED = 5
+
+
+def render_growth(handle):
+    """Follower and reel play-count history recorded on earlier fetches, with the fastest-growing reels"""
+    handle = normalize_params({"handle": handle})["handle"]
+    store = get_metrics_store()
+    window = GROWTH_WINDOWS[st.selectbox("Growth window", list(GROWTH_WINDOWS), index=1)]
+
+    followers = store.series(PROFILE, keys=[handle])
+    if followers and len(followers[0][1]) > 1:
+        rates = growth(followers, window=window).iloc[0]
+        per_day = rates["velocity_per_hour"] * 24
+        st.metric("Followers", format_number(int(rates["latest"])), delta=f"{per_day:+,.0f}/day" if pd.notna(per_day) else None)
+        st.line_chart(history(followers).set_index("time")["value"], height=200)
+
+    reels = [series for series in store.series(REEL, handle) if len(series[1]) > 1]
+    if not reels:
+        st.caption("Growth appears once reels have been fetched at least twice")
+        return
+    rates = growth(reels, window=window).sort_values("velocity_per_hour", ascending=False)
+    st.write("**Fastest-growing reels** (plays per hour; acceleration compares with the window before)")
+    st.dataframe(
+        rates.rename_axis("reel").reset_index().round(2),
+        hide_index=True,
+        column_config={"reel": st.column_config.TextColumn("reel")},
+    )
+    top = [series for series in reels if series[0] in set(rates.index[:TOP_REELS_CHARTED])]
+    st.line_chart(history(top), x="time", y="value", color="key", height=300)
+
+
+def render():
+    """Instagram profile header and its latest reels"""
+    st.title("🎞️ Instagram Profile & Reels Viewer")
+    handle = st.text_input("Enter Instagram handle (without @):")
+    reel_count = st.number_input("Number of reels", min_value=1, max_value=500, value=DEFAULT_REEL_COUNT, step=10)
+
+    if handle:
+        # Both requests go out together; the header renders as soon as the profile lands
+        profile_future = submit(fetch_profile, handle)
+        reel_pages = iter_reel_pages(handle, int(reel_count))
+
+        with st.spinner("Fetching profile..."):
+            profile = profile_future.result()
+
+        if profile.get("success") and "data" in profile:
+            user = profile["data"]["user"]
+            st.markdown(f"""
+            <div style='display: flex; gap: 20px; align-items: center; margin-bottom: 30px;'>
+                <img src="{user.get("profile_pic_url_hd")}" style='width: 90px; height: 90px; border-radius: 50%; border: 2px solid #ccc;'>
+                <div>
+                    <h2 style='margin: 0;'>{user.get("full_name", "Unknown")}</h2>
+                    <p style='margin: 0; font-size: 16px;'>@{user.get("username")}</p>
+                    <p style='margin: 5px 0;'>{user.get("biography", "No bio available.")}</p>
+                    <p>👥 <b>Followers:</b> {format_number(user.get("edge_followed_by", {}).get("count"))} | <b>Following:</b> {format_number(user.get("edge_follow", {}).get("count"))}</p>
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
+
+            if user.get("bio_links"):
+                st.subheader("🔗 Bio Links")
+                for link in user["bio_links"]:
+                    st.markdown(f"- [{link['title'] or link['url']}]({link['url']})")
+
+        else:
+            st.error("❌ Couldn't fetch profile information.")
+            st.write(profile)
+
+        reels_header = st.empty()
+        grid = ReelsGrid()
+        try:
+            for reels_data in reel_pages:
+                if reels_data and not len(grid):
+                    reels_header.subheader("🎥 Latest Reels")
+                with timer("render_seconds", section="reels_page"):
+                    grid.append(records(reels_frame(reels_data)))
+        except Exception as e:
+            st.error(f"Failed while loading reels: {e}")
+
+        if not len(grid):
+            st.warning("No reels found or failed to load reels.")
+        else:
+            render_export(
+                "instagram", lambda: instagram_records(handle, int(reel_count)), f"instagram-reels-{handle}", "instagram"
+            )
+
+        if st.toggle("📈 Growth analytics", help="Follower and play-count history from previous fetches"):
+            with timer("render_seconds", section="reel_growth"):
+                render_growth(handle)
@@ -0,0 +1,55 @@
+from html import escape
+
+import streamlit as st
+
+from views.formatting import format_number, format_timestamp
+
+GRID_STYLE = """
+<style>
+.reels-grid { display: grid; grid-template-columns: repeat(auto-fill, minmax(220px, 1fr)); gap: 20px; }
+.reel-card { background: #fff; border-radius: 16px; padding: 12px; box-shadow: 0 5px 20px rgba(0,0,0,0.1); }
+.reel-card img { width: 100%; aspect-ratio: 9 / 16; object-fit: cover; border-radius: 12px; background: #eee; }
+.reel-card p { margin: 6px 0; font-size: 14px; }
+.reel-caption { display: -webkit-box; -webkit-line-clamp: 3; -webkit-box-orient: vertical; overflow: hidden; }
+</style>
+"""
+
+
+def reel_card(reel):
+    """One reel from a reels_frame row as an HTML card; every field is escaped"""
+    caption = escape(reel["caption"] or "No caption")
+    video_url = escape(f"https://www.instagram.com/reel/{reel['code'] or ''}/", quote=True)
+    thumbnail = escape(reel["display_uri"] or "", quote=True)
+    return (
+        "<div class='reel-card'>"
+        f"<img src=\"{thumbnail}\" loading=\"lazy\" decoding=\"async\" alt=\"\">"
+        f"<p class='reel-caption' title=\"{escape(reel['caption'] or '', quote=True)}\"><strong>📝</strong> {caption}</p>"
+        f"<p><strong>📅</strong> {escape(format_timestamp(reel['taken_at']))}</p>"
+        f"<p>▶️ {format_number(reel['play_count'])} | ❤️ {format_number(reel['like_count'])}"
+        f" | 🔁 {format_number(reel['share_count'])}</p>"
+        f"<p><a href=\"{video_url}\" target=\"_blank\" rel=\"noopener\">🔗 View Reel</a></p>"
+        "</div>"
+    )
+
+
+class ReelsGrid:
+    """Every reel in one responsive grid element, redrawn in place as more pages arrive.
+
+    Replaces one components.html iframe per reel: the grid is plain HTML in the
+    page, sizes itself to its content and lets the browser lazy-load thumbnails.
+    Cards are built once; append() only formats the new reels.
+    """
+
+    def __init__(self):
+        self._slot = st.empty()
+        self._cards = []
+
+    def append(self, reels):
+        cards = [reel_card(reel) for reel in reels]
+        if not cards:
+            return
+        self._cards.extend(cards)
+        self._slot.html(GRID_STYLE + "<div class='reels-grid'>" + "".join(self._cards) + "</div>")
+
+    def __len__(self):
+        return len(self._cards)
@@ -0,0 +1,49 @@
+import time
+
+import streamlit as st
+
+from creative_index import PLATFORMS, get_index
+from views.formatting import format_date
+
+PLATFORM_ICONS = {"facebook": "📘", "google": "🔍", "instagram": "🎞️"}
+MAX_RESULTS = 100
+
+
+def render():
+    """Ranked full-text search over every creative fetched so far, without calling the API"""
+    st.title("🔎 Creative Search")
+    index = get_index()
+    counts = index.stats()
+    st.caption(
+        f"{sum(counts.values()):,} creatives indexed • "
+        + " • ".join(f"{PLATFORM_ICONS[platform]} {counts.get(platform, 0):,}" for platform in PLATFORMS)
+    )
+
+    col1, col2 = st.columns([3, 2])
+    with col1:
+        query = st.text_input("Search ad copy, headlines, CTAs, captions and brands", placeholder="e.g. free shipping")
+    with col2:
+        platforms = st.multiselect("Platforms", PLATFORMS, format_func=lambda platform: platform.title())
+
+    if not query.strip():
+        return
+
+    started = time.perf_counter()
+    results = index.search(query, platforms, limit=MAX_RESULTS)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    st.write(f"{len(results)} results in {elapsed_ms:.1f} ms")
+
+    for result in results:
+        st.markdown("---")
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            st.markdown(f"**{PLATFORM_ICONS[result['platform']]} {result['brand'] or 'Unknown brand'}**")
+            if result["title"]:
+                st.write(result["title"].replace("\n", " • "))
+            st.markdown(result["snippet"].replace("\n", " "))
+            if result["cta"]:
+                st.caption(f"CTA: {result['cta']}")
+        with col2:
+            st.caption(format_date(result["date"]))
+            if result["url"]:
+                st.markdown(f"[🔗 Open]({result['url']})")
@@ -0,0 +1,326 @@
+"""Competitor watchlist and the daemon that keeps it refreshed ahead of the dashboards.
+
+    python watchlist.py add facebook 51212153078 --priority 10
+    python watchlist.py add google nike.com --interval 3600
+    python watchlist.py add instagram nike
+    python watchlist.py list
+    python watchlist.py run              # refresh due entries until interrupted
+    python watchlist.py run --once       # refresh everything due now, then exit
+
+Facebook pages are synced into the incremental ad store, Google domains and
+Instagram handles into the response cache, under the same keys the
+dashboards read, so watched competitors open without an upstream call.
+"""
+import argparse
+import os
+import random
+import signal
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from fb_sync import get_sync_store
+from instagram_fetch import DEFAULT_REEL_COUNT
+from rate_limit import BULK, set_caller
+from response_cache import CACHE_DIR
+from scrapecreators import (
+    COMPANY_ADS,
+    ENDPOINT_TTLS,
+    GOOGLE_ADS,
+    INSTAGRAM_REELS,
+    get_google_ads,
+    get_instagram_profile,
+    get_instagram_reels,
+)
+
+# ========== CONFIG ==========
+WATCHLIST_PATH = os.path.join(CACHE_DIR, "watchlist.sqlite3")
+CONCURRENCY = int(os.environ.get("WATCHLIST_CONCURRENCY", 4))
+JITTER = 0.1  # each interval is stretched or shrunk by up to this fraction
+LEASE = 15 * 60  # seconds a claimed entry stays claimed if its refresher dies
+RETRY_BASE = 60  # first retry after a failure; doubles per consecutive failure, capped at the interval
+MAX_SLEEP = 30  # the daemon rechecks the watchlist at least this often, to see new entries
+KINDS = ["facebook", "google", "instagram"]
+# Refresh before the cached copy goes stale, even when jitter lands late
+DEFAULT_INTERVALS = {
+    "facebook": ENDPOINT_TTLS[COMPANY_ADS] * (1 - JITTER),
+    "google": ENDPOINT_TTLS[GOOGLE_ADS] * (1 - JITTER),
+    "instagram": ENDPOINT_TTLS[INSTAGRAM_REELS] * (1 - JITTER),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS watchlist (
+    kind TEXT NOT NULL,
+    target TEXT NOT NULL,
+    interval REAL NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    next_run REAL NOT NULL,
+    leased_until REAL NOT NULL DEFAULT 0,
+    last_run REAL,
+    last_error TEXT,
+    failures INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (kind, target)
+);
+CREATE INDEX IF NOT EXISTS watchlist_due ON watchlist (next_run);
+"""
+
+_COLUMNS = ["kind", "target", "interval", "priority", "next_run", "last_run", "last_error", "failures"]
+
+
+def normalize_target(kind, target):
+    target = str(target).strip()
+    if kind == "instagram":
+        return target.lstrip("@").lower()
+    if kind == "google":
+        return target.lower()
+    return target
+
+
+def jittered(seconds):
+    return seconds * random.uniform(1 - JITTER, 1 + JITTER)
+
+
+# ========== REFRESHERS ==========
+def refresh_facebook(page_id):
+    get_sync_store().sync(page_id)
+
+
+def refresh_google(domain):
+    get_google_ads(domain, fresh=True)
+
+
+def refresh_instagram(handle):
+    get_instagram_profile(handle, fresh=True)
+    get_instagram_reels(handle, DEFAULT_REEL_COUNT, fresh=True)
+
+
+REFRESHERS = {"facebook": refresh_facebook, "google": refresh_google, "instagram": refresh_instagram}
+
+
+class Watchlist:
+    """Watched targets with their refresh schedule; shared by every daemon and dashboard on the host"""
+
+    def __init__(self, path=WATCHLIST_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, kind, target, interval=None, priority=0):
+        """Watch target (or update its interval and priority); it is due right away"""
+        if kind not in REFRESHERS:
+            raise ValueError(f"Unknown watchlist kind: {kind}")
+        self._connect().execute(
+            "INSERT INTO watchlist (kind, target, interval, priority, next_run) VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT (kind, target) DO UPDATE SET interval = excluded.interval, priority = excluded.priority",
+            (kind, normalize_target(kind, target), interval or DEFAULT_INTERVALS[kind], priority, time.time()),
+        )
+
+    def remove(self, kind, target):
+        return self._connect().execute(
+            "DELETE FROM watchlist WHERE kind = ? AND target = ?", (kind, normalize_target(kind, target))
+        ).rowcount
+
+    def entries(self):
+        rows = self._connect().execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM watchlist ORDER BY priority DESC, kind, target"
+        )
+        return [dict(zip(_COLUMNS, row)) for row in rows]
+
+    def is_watched(self, kind, target):
+        row = self._connect().execute(
+            "SELECT 1 FROM watchlist WHERE kind = ? AND target = ?", (kind, normalize_target(kind, target))
+        ).fetchone()
+        return row is not None
+
+    def claim_due(self, limit):
+        """Lease up to limit due entries, highest priority first, so no other daemon refreshes them too"""
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT kind, target FROM watchlist WHERE next_run <= ? AND leased_until < ?"
+                " ORDER BY priority DESC, next_run LIMIT ?",
+                (now, now, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE watchlist SET leased_until = ? WHERE kind = ? AND target = ?",
+                [(now + LEASE, kind, target) for kind, target in rows],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return rows
+
+    def finish(self, kind, target, error=None):
+        """Schedule the next refresh: a jittered interval on success, backing off after failures"""
+        now = time.time()
+        row = self._connect().execute(
+            "SELECT interval, failures FROM watchlist WHERE kind = ? AND target = ?", (kind, target)
+        ).fetchone()
+        if row is None:
+            return  # removed while it was refreshing
+        interval, failures = row
+        failures = 0 if error is None else failures + 1
+        delay = interval if error is None else min(interval, RETRY_BASE * 2 ** (failures - 1))
+        self._connect().execute(
+            "UPDATE watchlist SET next_run = ?, leased_until = 0, last_run = ?, last_error = ?, failures = ?"
+            " WHERE kind = ? AND target = ?",
+            (now + jittered(delay), now, error, failures, kind, target),
+        )
+
+    def next_due(self):
+        row = self._connect().execute("SELECT MIN(MAX(next_run, leased_until)) FROM watchlist").fetchone()
+        return row[0]
+
+
+_watchlist = None
+_watchlist_lock = threading.Lock()
+
+
+def get_watchlist():
+    global _watchlist
+    if _watchlist is None:
+        with _watchlist_lock:
+            if _watchlist is None:
+                _watchlist = Watchlist()
+    return _watchlist
+
+
+class WatchlistDaemon:
+    """Refreshes due watchlist entries on a bounded pool, as a bulk caller of the shared API budget.
+
+    Interactive dashboard sessions are always served first by the fair
+    scheduler, so the daemon only spends rate-limit headroom nobody is using.
+    """
+
+    def __init__(self, watchlist=None, concurrency=CONCURRENCY, log=None):
+        self.watchlist = watchlist or get_watchlist()
+        self.concurrency = concurrency
+        self.log = log or (lambda message: None)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="watchlist")
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    def _refresh(self, kind, target):
+        set_caller("watchlist", BULK)
+        started = time.perf_counter()
+        error = None
+        try:
+            REFRESHERS[kind](target)
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        self.watchlist.finish(kind, target, error)
+        elapsed = time.perf_counter() - started
+        self.log(f"[{'error' if error else 'ok'}] {kind} {target} in {elapsed:.1f}s" + (f": {error}" if error else ""))
+        with self._lock:
+            self._in_flight -= 1
+        self._wake.set()
+
+    def dispatch(self):
+        """Start refreshes for due entries while there are free slots; returns how many started"""
+        with self._lock:
+            free = self.concurrency - self._in_flight
+        if free <= 0:
+            return 0
+        claimed = self.watchlist.claim_due(free)
+        with self._lock:
+            self._in_flight += len(claimed)
+        for kind, target in claimed:
+            self._executor.submit(self._refresh, kind, target)
+        return len(claimed)
+
+    def idle(self):
+        with self._lock:
+            return self._in_flight == 0
+
+    def run_once(self):
+        """Refresh everything due now and wait for it to finish"""
+        while True:
+            self.dispatch()
+            if self.idle():
+                next_due = self.watchlist.next_due()
+                if next_due is None or next_due > time.time():
+                    return
+            self._wake.wait(1)
+            self._wake.clear()
+
+    def run(self):
+        """Refresh due entries until stop() is called"""
+        while not self._stop.is_set():
+            self.dispatch()
+            next_due = self.watchlist.next_due()
+            sleep = MAX_SLEEP if next_due is None else min(MAX_SLEEP, max(0.0, next_due - time.time()))
+            self._wake.wait(max(sleep, 0.05))
+            self._wake.clear()
+        self._executor.shutdown(wait=True)
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+
+def _format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%b %d %H:%M:%S") if timestamp else "never"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Competitor watchlist refresh daemon")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="Watch a page ID, domain or handle")
+    add.add_argument("kind", choices=KINDS)
+    add.add_argument("target")
+    add.add_argument("--interval", type=float, help="Seconds between refreshes; defaults to just under the cache TTL")
+    add.add_argument("--priority", type=int, default=0, help="Higher refreshes first when several are due")
+    remove = commands.add_parser("remove", help="Stop watching")
+    remove.add_argument("kind", choices=KINDS)
+    remove.add_argument("target")
+    commands.add_parser("list", help="Show every entry and its schedule")
+    run = commands.add_parser("run", help="Refresh due entries until interrupted")
+    run.add_argument("--once", action="store_true", help="Refresh what is due now, then exit")
+    run.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    args = parser.parse_args(argv)
+
+    watchlist = get_watchlist()
+    if args.command == "add":
+        watchlist.add(args.kind, args.target, args.interval, args.priority)
+    elif args.command == "remove":
+        if not watchlist.remove(args.kind, args.target):
+            print(f"Not watched: {args.kind} {args.target}", file=sys.stderr)
+            return 1
+    elif args.command == "list":
+        for entry in watchlist.entries():
+            status = f"failing x{entry['failures']}: {entry['last_error']}" if entry["failures"] else "ok"
+            print(
+                f"{entry['kind']:<10} {entry['target']:<30} every {entry['interval'] / 60:.0f}m"
+                f"  priority {entry['priority']}  last {_format_time(entry['last_run'])}"
+                f"  next {_format_time(entry['next_run'])}  {status}"
+            )
+    else:
+        daemon = WatchlistDaemon(watchlist, args.concurrency, log=lambda message: print(message, file=sys.stderr))
+        if args.once:
+            daemon.run_once()
+        else:
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(signum, lambda *_: daemon.stop())
+            daemon.run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())